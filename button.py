@@ -1,4 +1,5 @@
 import pygame
+from text_cache import render_text
 
 
 
@@ -27,6 +28,16 @@ class Button:
         """Sets the state of the button."""
         self._active = state        
         
+    @property
+    def rect(self) -> pygame.Rect:
+        """Returns the area of the window that the button draws on."""
+        return self._button
+
+    @property
+    def appearance(self) -> tuple:
+        """Returns everything that the drawing of the button depends on."""
+        return self._button_color, self._text
+
     def set_text_position(self, x_div: int, y_div: int) -> None:
         """Sets the coordinate of the text."""
         x, y, button_width, button_height = self._dimension
@@ -41,7 +52,7 @@ class Button:
     def _display_text(self, surface: pygame.surface) -> None:
         """Displays the text on the surface of the button."""
         black = (0, 0, 0)
-        text = self._font.render(str(self._text), True, black)
+        text = render_text(self._font, str(self._text), black)
         surface.blit(text, self._text_position)
     
     def execute(self) -> None:
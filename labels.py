@@ -1,4 +1,5 @@
 import pygame
+from text_cache import render_text
 
 class Label:
     
@@ -30,6 +31,16 @@ class Label:
         """Returns the (x,y) coordinate of the label."""
         return self._coordinates
     
+    @property
+    def rect(self) -> pygame.Rect:
+        """Returns the area of the window that the label draws on."""
+        return pygame.Rect(self._rect)
+
+    @property
+    def appearance(self) -> tuple:
+        """Returns everything that the drawing of the label depends on."""
+        return self._text, self._color
+
     def _set_dimensions(self, width: int, height: int) -> None:
         """Sets the dimensions of the display label."""
         self._width = width # 250
@@ -54,7 +65,7 @@ class Label:
     def _display_text(self, surface: pygame.surface) -> None:
         """Displays the text on the label."""
         black = (0, 0, 0)
-        text_font = self._font.render(str(self._text), True, black)
+        text_font = render_text(self._font, str(self._text), black)
         surface.blit(text_font, self._text_position)
     
 
@@ -75,6 +86,18 @@ class StrikesLabel(Label):
         self._draw_strikes(surface)
         self._draw_lines(surface)
         
+    @property
+    def rect(self) -> pygame.Rect:
+        """Returns the area of the window that the label draws on, including X's that stick out of it."""
+        x, y = self.coordinates
+        width, height = self._font.size("X")
+        return Label.rect.fget(self).union((x + 10 + 100 * 2, y, width, height))
+
+    @property
+    def appearance(self) -> tuple:
+        """Returns everything that the drawing of the label depends on."""
+        return Label.appearance.fget(self) + (self.strikes,)
+
     def _draw_lines(self, surface: pygame.surface) -> None:
         """Draw lines on the display board to separate the X's."""
         x,y = self.coordinates
@@ -94,7 +117,7 @@ class StrikesLabel(Label):
         start_x, start_y = x + 10, y
         end_x, end_y = x + 75, y + 200
         for _ in range(self.strikes):
-            text = self._font.render("X", True, red)
+            text = render_text(self._font, "X", red)
             surface.blit(text,(start_x, start_y, end_x, end_y) )
             start_x += 100
             end_x = start_x + 75
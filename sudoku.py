@@ -1,73 +1,180 @@
-from itertools import product
-from math import sqrt
-from random import shuffle, randint
-from copy import deepcopy
-from sudoku_scraper import get_sudoku_puzzle, get_sudoku_solution
+from array import array
+from collections.abc import Mapping
+from itertools import count
+from random import Random, SystemRandom
+from time import perf_counter
+from sudoku_scraper import scrape_puzzle
+from sudoku_solver import BitmaskSolver
+from sudoku_engines import ENGINES
+from sudoku_grids import shuffled_grid
+from sudoku_grader import grade
+from sudoku_codec import cells_of
+from sudoku_units import SIZE, BLOCK_SIZE, CELLS, COORDS, BOX_COORDS, ROW_PEERS, COL_PEERS, BOX_PEERS, PEERS, \
+    index_of
+
+
+_DEFAULT_CLUES = 19
+_MAX_ATTEMPTS = 100
+_ALL_CANDIDATES = (1 << SIZE) - 1
+_BIT = (0,) + tuple(1 << digit for digit in range(SIZE))
+_MASK_DIGITS = tuple(tuple(digit for digit in range(1, SIZE + 1) if mask & _BIT[digit])
+                     for mask in range(1 << SIZE))
+_CLOSED = -1
+_NO_MARKS = array('h', [_CLOSED]) * CELLS
+_INDEX = {coord: index for index, coord in enumerate(COORDS)}
+_VERSIONS = count(1)
+
+
+class PencilMarks(Mapping):
+    """
+    Represents a read-only view of the pencil marks of a sudoku game that maps
+    the coordinates of its open cells to their possible values. The view reads
+    the game's flat array of candidate masks, so it stays up to date.
+    """
+    __slots__ = ('_marks',)
+
+    def __init__(self, marks: array) -> None:
+        """Initializes the view over the given array of candidate masks."""
+        self._marks = marks
+
+    def __getitem__(self, coord: (int, int)) -> {int}:
+        """Returns a new set of the possible values of the open cell at the coordinate."""
+        index = _INDEX.get(coord)
+        if index is None or self._marks[index] == _CLOSED:
+            raise KeyError(coord)
+        return set(_MASK_DIGITS[self._marks[index]])
+
+    def __contains__(self, coord: (int, int)) -> bool:
+        """Returns True if the cell at the coordinate is open."""
+        index = _INDEX.get(coord)
+        return index is not None and self._marks[index] != _CLOSED
+
+    def __iter__(self) -> iter:
+        """Yields the coordinates of the open cells in row-major order."""
+        return (COORDS[index] for index, mask in enumerate(self._marks) if mask != _CLOSED)
+
+    def __len__(self) -> int:
+        """Returns the number of open cells."""
+        return CELLS - self._marks.count(_CLOSED)
+
+
+class Snapshot:
+    """
+    Represents an immutable copy of the board that the renderer draws from.
+    The game publishes a new snapshot, with a higher version, by rebinding a
+    single attribute, so threads that read it always see a whole snapshot
+    without taking a lock.
+    """
+    __slots__ = ('_version', '_board', '_open_cells', '_zeros', '_is_generating')
+
+    def __init__(self, version: int, board: ((int,),), open_cells: frozenset, zeros: int,
+                 is_generating: bool) -> None:
+        """Initializes the snapshot."""
+        self._version = version
+        self._board = board
+        self._open_cells = open_cells
+        self._zeros = zeros
+        self._is_generating = is_generating
+
+    @property
+    def version(self) -> int:
+        """Returns the version of the snapshot, which is higher for newer snapshots."""
+        return self._version
+
+    @property
+    def board(self) -> ((int,),):
+        """Returns the NxN sudoku board as a tuple of rows."""
+        return self._board
+
+    @property
+    def open_cells(self) -> frozenset:
+        """Returns the coordinates of the cells that the user can still fill in."""
+        return self._open_cells
+
+    @property
+    def zeros(self) -> int:
+        """Returns the number of cells that were open when the puzzle was set, or None before the first puzzle."""
+        return self._zeros
+
+    @property
+    def is_generating(self) -> bool:
+        """Returns True if a puzzle was being generated."""
+        return self._is_generating
 
 
 class Sudoku:
-    
-    def __init__(self) -> None:
-        """Initializes the state of the Sudoku Game."""
-        self._rows = 9
-        self._columns = 9
-        self._board = [[0 for _ in range(self._columns)] for _ in range(self._rows)]
-        self._counter = 0
-        self._solution = [[0 for _ in range(self._columns)] for _ in range(self._rows)]
-        self._history = {}
+    __slots__ = ('_engine', '_cells', '_solution', '_marks', '_zeros', '_puzzle_id', '_snapshot',
+                 'is_generating', 'is_solving')
+
+    def __init__(self, engine: str = 'bitmask') -> None:
+        """
+        Initializes the state of the Sudoku Game. The engine names the solver
+        backend used for solving and uniqueness checks: 'bitmask' or 'dlx'.
+        The board and its solution are stored as flat row-major arrays of 81
+        entries, and the pencil marks as a flat array of 9-bit candidate masks
+        with -1 for the cells that are not open.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f'unknown solver engine: {engine!r}')
+        self._engine = ENGINES[engine]
+        self._cells = array('b', bytes(CELLS))
+        self._solution = array('b', bytes(CELLS))
+        self._marks = _NO_MARKS[:]
         self._zeros = None
+        self._puzzle_id = None
         self.is_generating = False
         self.is_solving = False
-        
-    @property
-    def is_generating(self) -> bool:
-        return self._is_generating
-    
-    @is_generating.setter
-    def is_generating(self, state: bool) -> None:
-        self._is_generating = state
-    
+        self._publish()
+
     @property
-    def is_solving(self) -> bool:
-        return self._is_solving 
-    
-    @is_solving.setter
-    def is_solving(self, state: bool) -> None:
-        self._is_solving = state
-        
+    def snapshot(self) -> Snapshot:
+        """
+        Returns the latest published snapshot of the board. Unlike board and
+        pencil_marks, it is safe to read while another thread changes the game.
+        """
+        return self._snapshot
+
     @property
     def zeros(self) -> int:
         """Returns the number of clues available on the board."""
         return self._zeros
     
+    @property
+    def puzzle_id(self) -> str:
+        """
+        Returns the id of the generated puzzle, which regenerate_puzzle turns back
+        into the identical puzzle, or None if the puzzle was not generated locally.
+        """
+        return self._puzzle_id
+
     @property
     def board(self) -> [[int]]:
-        """Returns the NxN sudoku board."""
-        return self._board
+        """Returns a copy of the NxN sudoku board."""
+        return [self._cells[row:row + SIZE].tolist() for row in range(0, CELLS, SIZE)]
     
     @property
-    def pencil_marks(self) -> {(int, int): {int}}:
+    def solution(self) -> [[int]]:
+        """Returns a copy of the solution to the current NxN sudoku board."""
+        return [self._solution[row:row + SIZE].tolist() for row in range(0, CELLS, SIZE)]
+
+    @property
+    def pencil_marks(self) -> PencilMarks:
         """
-        Returns that history dictionary that contains all the coordinates of
-        the empty cells and their possible values.
+        Returns a view that maps the coordinates of all the empty cells
+        to their possible values.
         """
-        return self._history
+        return PencilMarks(self._marks)
 
-    def _new_game(self) -> None:
-        """Resets the board."""
-        for row in range(self._columns):
-            for col in range(self._rows):
-                self.board[row][col] = 0
-    
     def valid_move(self, coord: (int, int), entry: int) -> bool:
         """
         Returns True if the entry can be entered at the given
         coordinate.
         """
-        row, col = coord
-        if self._solution[row][col] == entry:
-            self.pencil_marks.pop(coord)
-            self.board[row][col] = entry
+        index = index_of(coord)
+        if self._solution[index] == entry:
+            self._marks[index] = _CLOSED
+            self._cells[index] = entry
+            self._publish()
             return True
         return False
 
@@ -76,101 +183,104 @@ class Sudoku:
         Finds/returns the first coordinate of an empty cell it finds
         in the board.
         """
-        for row_pos, row in enumerate(self.board):
-            for col_pos, entry in enumerate(row):
-                if entry == 0:
-                    return row_pos, col_pos
+        if 0 in self._cells:
+            return COORDS[self._cells.index(0)]
 
-    def _generate(self) -> bool:
-        """
-        Recursively creates a sudoku puzzle using backtracking algorithm.
-        """
-        coord = self.find_blank_cell()
-        if not coord:
-            return True
-        else:
-            row, col = coord
-            numbers = list(range(1, self._columns + 1))
-            shuffle(numbers)
-            for number in numbers:
-                if self.is_valid_entry(number, (row, col)):
-                    self.board[row][col] = number
-                    if self._generate():
-                        return True
-                    self.board[row][col] = 0
-            return False
+    def generate_puzzle(self, seed: int = None, clues: int = None, time_budget: float = None,
+                        difficulty: str = None) -> None:
+        """
+        Generates a sudoku puzzle with a unique solution by removing clues from a
+        shuffled solved grid until only the given number of clues is left or no more
+        can be removed. If a difficulty ('easy', 'medium' or 'hard') is given, new grids
+        are tried until the grader rates a puzzle at that difficulty. If a time budget
+        in seconds is given, new grids are tried until both targets are met or the
+        budget runs out, and the best puzzle is kept. Without a time budget, the same
+        seed always generates the same puzzle; without a seed, a random 64-bit seed
+        is drawn.
+        """
+        if seed is None:
+            seed = SystemRandom().getrandbits(64)
+        clues = _DEFAULT_CLUES if clues is None else clues
+        deadline = None if time_budget is None else perf_counter() + time_budget
+        attempts = Random(seed)
+        best = None
+        self.is_generating = True
+        self._publish()
+        for attempt in count(1):
+            self._generate_attempt(seed, clues)
+            matches = difficulty is None or grade(self._cells).difficulty == difficulty
+            if best is None or (matches, self.zeros) > best[0]:
+                best = ((matches, self.zeros), self._cells[:], self._solution, self.puzzle_id)
+            if matches and CELLS - self.zeros <= clues:
+                break
+            if deadline is None and (matches or attempt >= _MAX_ATTEMPTS):
+                break
+            if deadline is not None and perf_counter() >= deadline:
+                break
+            seed = attempts.getrandbits(64)
+        if best[3] != self.puzzle_id:
+            self.load_puzzle(*best[1:])
+        self.is_generating = False
+        self._publish()
 
-    def generate_puzzle(self) -> None:
+    def _generate_attempt(self, seed: int, clues: int) -> None:
         """
-        Generates a completed sudoku puzzle that follows the rules
-        of a valid sudoku puzzle.
+        Creates a puzzle from the grid and removal order that the given seed
+        determines, and issues it the puzzle id that regenerates it.
         """
-        self._new_game()
-        self.is_generating = True
-        self.pencil_marks.clear()
-        self._generate()
-        self._shuffle_sudoku_board()
-        self._create_puzzle()
+        rng = Random(seed)
+        self._puzzle_id = f'{seed:016x}' if clues == _DEFAULT_CLUES else f'{seed:016x}-{clues}'
+        self._cells = array('b', cells_of(shuffled_grid(rng)))
+        self._marks[:] = _NO_MARKS
+        self._create_puzzle(clues, rng)
         self._zeros = len(self.pencil_marks)
-        self.is_generating = False
-        
-    def _shuffle_sudoku_board(self) -> None:
+
+    def regenerate_puzzle(self, puzzle_id: str) -> None:
+        """Generates the identical puzzle that the given puzzle id was issued for."""
+        seed, _, clues = puzzle_id.partition('-')
+        self.generate_puzzle(int(seed, 16), int(clues) if clues else None)
+
+    def load_puzzle(self, puzzle: '[int] | [[int]]', solution: '[int] | [[int]]', puzzle_id: str = None) -> None:
         """
-        Shuffles the sudoku board to randomize the values while maintaining
-        the integrity of the board.
+        Replaces the current game with the given NxN or flat puzzle and its
+        solution, such as one that was generated ahead of time. The puzzle id is
+        the one it was generated under, or None for a puzzle from anywhere else.
         """
-        count = 0
-        for row1, row2 in Sudoku._generate_number():
-            count += 1
-            self.board[row1], self.board[row2] = self.board[row2], self.board[row1]
-            if count % 6 == 0:
-                break
-        
-        for col1, col2 in Sudoku._generate_number():
-            count += 1
-            for row in range(self._rows):
-                self.board[row][col1], self.board[row][col2] = self.board[row][col2], self.board[row][col1]
-            if count % 6 == 0:
-                break
-
-    @staticmethod
-    def _generate_number() -> (int, int):
-        lower_limit = 0
-        while True:
-            pos1 = randint(lower_limit % 9, (lower_limit % 9) + 2)
-            pos2 = randint(lower_limit % 9, (lower_limit % 9) + 2)
-            if pos1 != pos2:
-                yield pos1, pos2
-                lower_limit += 3
-
-    def webscrape_puzzle(self, response: (str, str)) -> None:
-        self.pencil_marks.clear()
-        puzzle_id = get_sudoku_puzzle(response, self._board)
-        get_sudoku_solution(('solution', int(puzzle_id)), self._solution)
+        self._puzzle_id = puzzle_id
+        self._cells = array('b', cells_of(puzzle))
+        self._solution = array('b', cells_of(solution))
         self._create_pencil_marks()
         self._zeros = len(self.pencil_marks)
+        self._publish()
+
+    def webscrape_puzzle(self, response: (str, int), cross_check: bool = False) -> None:
+        """
+        Replaces the current game with a puzzle of the (difficulty, level) response
+        from the website. The puzzle is solved locally; the website's solution page
+        is only fetched if the puzzle is not unique, or if cross_check is True.
+        """
+        puzzle, solution, _ = scrape_puzzle(response, cross_check)
+        self.load_puzzle(puzzle, solution)
 
     def print_puzzle(self):
         """Prints a neatly formatted sudoku grid."""
-        mod = int(sqrt(self._rows))
-        power = self._rows * mod
+        power = SIZE * BLOCK_SIZE
         for j, row in enumerate(self.board, start=1):
             for i, entry in enumerate(row, start=1):
                 print(' ' if entry == 0 else entry, end=' ')
-                print('|' if i % mod == 0 and i != self._rows else '', end=' ')
-            print('\n' + '-' * power if j % mod == 0 and j != self._rows else '')
+                print('|' if i % BLOCK_SIZE == 0 and i != SIZE else '', end=' ')
+            print('\n' + '-' * power if j % BLOCK_SIZE == 0 and j != SIZE else '')
 
     def is_full(self) -> bool:
         """Board is solved if every spot is filled with a number."""
-        return all(0 not in row for row in self.board)
+        return 0 not in self._cells
 
     def is_correct_solution(self) -> bool:
         """
         Returns True if the solved puzzle is valid by checking all its rows
         columns and blocks.
         """
-        return all(self.is_valid_entry(entry, (i, j))
-                   for i, row in enumerate(self.board) for j, entry in enumerate(row))
+        return all(self.is_valid_entry(entry, COORDS[index]) for index, entry in enumerate(self._cells))
 
     def is_valid_entry(self, entry, coord: (int, int)) -> bool:
         """
@@ -187,189 +297,169 @@ class Sudoku:
         
     def _is_valid_row_entry(self, entry: int, coord: (int, int)) -> bool:
         """Returns True if entry is not in the row."""
-        x, y = coord
-        return all(entry != number for i, number in enumerate(self.board[x]) if y != i)
+        cells = self._cells
+        return all(entry != cells[peer] for peer in ROW_PEERS[index_of(coord)])
     
     def _is_valid_col_entry(self, entry: int, coord: (int, int)) -> bool:
         """Returns True if entry is not in the column."""
-        x, y = coord
-        return all(entry != self.board[i][y] for i, _ in enumerate(self.board) if i != x)
+        cells = self._cells
+        return all(entry != cells[peer] for peer in COL_PEERS[index_of(coord)])
     
-    def determine_block(self, coord: (int, int)):
+    def determine_block(self, coord: (int, int)) -> ((int, int),):
         """
-        Determines/Returns a generator of coordinates that reside in the same
+        Determines/Returns a tuple of coordinates that reside in the same
         block that the given coordinates belongs to.
         """
-        row, col = coord
-        mod = int(sqrt(self._columns))
-        row_range = range(row + -(row % mod), row + abs(row % mod - mod))
-        col_range = range(col + -(col % mod), col + abs(col % mod - mod))
-        return product(row_range, col_range)
+        return BOX_COORDS[index_of(coord)]
 
     def _is_valid_block_entry(self, entry: int, coord: (int, int)) -> bool:
         """Returns True if entry is not in the 3 x 3 block."""
-        block = self.determine_block(coord)
-        return all(entry != self.board[row][col] for row, col in block if coord != (row, col))
+        cells = self._cells
+        return all(entry != cells[peer] for peer in BOX_PEERS[index_of(coord)])
 
-    def _create_puzzle(self):
+    def _create_puzzle(self, clues: int, rng: Random) -> None:
         """
         Carefully determines which cells should be removed from the filled sudoku board to
         create the puzzle while ensuring that the algorithm maintains the same solution.
+        Every cell is tried once in random order, together with its symmetric partner
+        when possible, until only the given number of clues is left. Removing a cell
+        that fails once can never succeed later, so no cell needs a second try.
+        """
+        self._solution = self._cells[:]
+        marks = self._marks
+        indexes = list(range(CELLS))
+        rng.shuffle(indexes)
+        for index in indexes:
+            clues_left = marks.count(_CLOSED)
+            if clues_left <= clues:
+                break
+            if marks[index] != _CLOSED:
+                continue
+            partner = CELLS - 1 - index
+            if partner != index and marks[partner] == _CLOSED and clues_left - 2 >= clues \
+                    and self._remove_clues([index, partner]):
+                continue
+            self._remove_clues([index])
+
+    def _remove_clues(self, indexes: [int]) -> bool:
         """
-        cells = list(product(range(self._rows), range(self._rows)))
-        rounds = 30
-        self._solution = deepcopy(self.board)
-        
-        while rounds and len(self.pencil_marks) <= 61:
-            shuffle(cells)
-            row, col = cells.pop()
-            entry = self.board[row][col]
-            
-            self.board[row][col] = 0
-            self._create_pencil_marks()
-            self._counter = 0
-            self._solve_puzzle('remove')
-            
-            if self._counter != 1:
-                rounds -= 1
-                self.board[row][col] = entry
-                self.pencil_marks.pop((row, col))
-                cells.append((row, col))
-        self._create_pencil_marks()
-    
-    def solve(self) -> None:
-        self.is_solving = True
-        self._solve_puzzle()
-        self.is_solving = False
+        Empties the cells at the given indexes, updating the pencil marks
+        incrementally, and keeps them empty if the puzzle still has a unique
+        solution. Returns True if the cells were removed.
+        """
+        for index in indexes:
+            self._blank_cell(index)
+        if not self._has_other_solution(indexes):
+            return True
+        for index in indexes:
+            self._restore_cell(index, self._solution[index])
+        return False
 
-    def _solve_puzzle(self, action: str = 'solve') -> bool:
-        """
-        If the given action is 'solve', the function solves the current sudoku
-        puzzle using the backtracking algorithm in addition with least constraining value
-        heuristic, most constrained heuristic, and forward checking.
-        If the given action is 'remove', the function carefully picks which cells
-        should be empty while ensuring the solution has a unique solution.
-        It also uses the same algorithm.
-        """
-        coord = min(self.pencil_marks, default='empty', key=lambda coord: len(self.pencil_marks[coord]))
-        if coord == 'empty':
-            return True 
-        else:
-            row, col = coord
-            possible_entries = self.pencil_marks[coord]
-            failed_entries = set()
-            self.pencil_marks.pop(coord)
-            while possible_entries:
-                number = self._least_constraining_value(coord, possible_entries)
-                possible_entries.discard(number)
-                if self.is_valid_entry(number, coord):
-                    self.board[row][col] = number
-                    self._forward_checking(coord, number, 'discard')
-                    if self._solve_puzzle(action):
-                        if action == 'remove':
-                            self._counter += 1
-                        else:
-                            return True
-                    self._forward_checking(coord, number, 'add')
-                    self.board[row][col] = 0
-                    failed_entries.add(number)
-            if action == 'remove':
-                self.board[row][col] = 0
-            self.pencil_marks[coord] = failed_entries
-            return False
+    def _has_other_solution(self, indexes: [int]) -> bool:
+        """
+        Returns True if the puzzle has a solution other than the known one.
+        The puzzle was unique before the cells at the given indexes were
+        emptied, so any other solution must differ in one of them. Each cell is
+        checked in turn by forbidding its solution value, with the cells before
+        it pinned to theirs.
+        """
+        cells = self._cells.tolist()
+        for index in indexes:
+            solver = self._engine(cells)
+            solver.forbid(COORDS[index], self._solution[index])
+            if solver.count_solutions(1):
+                return True
+            cells[index] = self._solution[index]
+        return False
 
-    def _least_constraining_value(self, coord: (int, int), entries: [int]) -> int:
-        """
-        Following the least constraining value heuristic, this function
-        returns the entry from the given entry list that least appears in its
-        row, column, and block.
-        """
-        neighboring_values = self._find_neighboring_values(coord)
-        values = [*entries]
-        for value in neighboring_values:
-            values.extend(self.pencil_marks[value])
-        return min(entries, key=lambda value: values.count(value))
-                    
-    def _find_neighboring_values(self, coord: (int, int)) -> {(int, int)}:
-        """
-        Returns a set of coordinates that are in the same row, column and 
-        block as the given coordinate.
-        """
-        row, col = coord
-        block = self.determine_block(coord)
-        row_values = {(row, pos) for pos in range(self._rows) if (row, pos) in self.pencil_marks}
-        col_values = {(pos, col) for pos in range(self._columns) if (pos, col) in self.pencil_marks}
-        block_values = {pos for pos in block if pos in self.pencil_marks}
-        neighboring_values = set()
-        neighboring_values.update(row_values, col_values, block_values)
-        return neighboring_values
-    
-    def _create_pencil_marks(self) -> None:
+    def _used_digits(self, index: int) -> int:
+        """Returns the mask of the digits that the peers of the cell hold."""
+        cells = self._cells
+        used = 0
+        for peer in PEERS[index]:
+            used |= _BIT[cells[peer]]
+        return used
+
+    def _blank_cell(self, index: int) -> None:
+        """
+        Empties the cell and updates the pencil marks of it and its empty peers
+        instead of rebuilding them all.
+        """
+        cells, marks = self._cells, self._marks
+        bit = _BIT[cells[index]]
+        cells[index] = 0
+        marks[index] = _ALL_CANDIDATES & ~self._used_digits(index)
+        for peer in PEERS[index]:
+            if marks[peer] != _CLOSED and not self._used_digits(peer) & bit:
+                marks[peer] |= bit
+
+    def _restore_cell(self, index: int, entry: int) -> None:
+        """Puts the entry back into the empty cell and discards it from its peers' pencil marks."""
+        cells, marks = self._cells, self._marks
+        cells[index] = entry
+        marks[index] = _CLOSED
+        for peer in PEERS[index]:
+            if marks[peer] != _CLOSED:
+                marks[peer] &= ~_BIT[entry]
+
+    def solve(self) -> None:
         """
-        Creates a dictionary that contains the coordinates of cells that 
-        are empty and the possible values that can go into each cell.
+        Fills the board with the solution. A new snapshot is only published if
+        the board had empty cells to fill, so solving a full board costs no redraw.
         """
-        clues_coords = []
-        for row_pos, row in enumerate(self.board):
-            for col_pos, entry in enumerate(row):
-                if entry == 0:
-                    self.pencil_marks[(row_pos, col_pos)] = set(range(1, self._rows + 1))
-                else:
-                    clues_coords.append((row_pos, col_pos, entry))
-        for row, col, number in clues_coords:
-            self._forward_checking((row, col), number, 'discard')
+        self.is_solving = True
+        is_changed = 0 in self._cells and self._solve_puzzle()
+        self.is_solving = False
+        if is_changed:
+            self._publish()
 
-    def _forward_checking(self, coord: (int, int), entry: int, action: str) -> None:
+    def count_solutions(self, limit: int = 2) -> int:
         """
-        Alters what values can go in each empty cell by either adding new values
-        or getting rid of the certain values in the rows, columns or block.
+        Returns the number of solutions the current puzzle has, stopping as soon
+        as the given limit is reached. With the default limit of 2, a result of 1
+        means the puzzle has a unique solution.
         """
-        self._alter_row(coord, entry, action)
-        self._alter_col(coord, entry, action)
-        self._alter_block(coord, entry, action)
-    
-    def _alter_history(self, coord: (int, int), action: str, entry: int) -> None:
+        return self._engine(self._cells).count_solutions(limit)
+
+    def hint(self) -> ((int, int), int):
         """
-        Alters the set of values of an empty cell in the history dictionary
-        by removing or adding the given entry/number.
+        Returns the coordinate and entry of an empty cell that constraint propagation
+        can fill without guessing, or None if no such cell exists.
         """
-        if action == 'discard':
-            self.pencil_marks[coord].discard(entry)
-        else:
-            self.pencil_marks[coord].add(entry)
+        solver = BitmaskSolver(self._cells)
+        if not solver.propagate():
+            return None
+        solved = solver.cells
+        return next(((COORDS[index], solved[index]) for index, mask in enumerate(self._marks)
+                     if mask != _CLOSED and solved[index] != 0), None)
 
-    def _alter_row(self, coord: (int, int), entry: int, action: str) -> None:
+    def _solve_puzzle(self) -> bool:
         """
-        Using the row number that is included in the given coordinate,
-        it finds all the empty cells in the same row and manipulates their set
-        of possible values.
+        Solves the current sudoku puzzle using the selected engine. The bitmask solver
+        applies backtracking in addition with most constrained heuristic and constraint
+        propagation, while the dlx solver runs Algorithm X on dancing links.
         """
-        row, _ = coord
-        for pos in range(self._rows):
-            if (row, pos) in self.pencil_marks:
-                self._alter_history((row, pos), action, entry)
+        solver = self._engine(self._cells)
+        if not solver.solve():
+            return False
+        self._cells = array('b', solver.cells)
+        self._marks[:] = _NO_MARKS
+        return True
     
-    def _alter_col(self, coord: (int, int), entry: int, action: str) -> None:
-        """
-        Using the column number that is included in the given coordinate,
-        it finds all the empty cells in the same column and manipulates their set
-        of possible values.
-        """
-        _, col = coord
-        for pos in range(self._columns):
-            if (pos, col) in self.pencil_marks:
-                self._alter_history((pos, col), action, entry)
+    def _publish(self) -> None:
+        """Publishes a snapshot of the current board for the renderer to draw."""
+        self._snapshot = Snapshot(next(_VERSIONS), tuple(tuple(row) for row in self.board),
+                                  frozenset(self.pencil_marks), self.zeros, self.is_generating)
 
-    def _alter_block(self, coord: (int, int), entry: int, action: str) -> None:
+    def _create_pencil_marks(self) -> None:
         """
-        Using the given coordinate, it finds all the empty cells in the same block 
-        and manipulates their set of possible values.
+        Creates the candidate masks of the cells that are empty from the
+        values that their rows, columns and blocks already hold.
         """
-        block = self.determine_block(coord)
-        for pos in block:
-            if pos in self.pencil_marks:
-                self._alter_history(pos, action, entry)
-
+        self._marks[:] = _NO_MARKS
+        for index, entry in enumerate(self._cells):
+            if entry == 0:
+                self._marks[index] = _ALL_CANDIDATES & ~self._used_digits(index)
 
 if __name__ == '__main__':
     s = Sudoku()
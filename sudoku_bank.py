@@ -0,0 +1,99 @@
+import asyncio
+import random
+import sqlite3
+from threading import Lock
+from sudoku_scraper import AsyncScraper, BASE_URL
+from sudoku_codec import pack, unpack, to_board
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS puzzles (
+    difficulty TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    puzzle BLOB NOT NULL UNIQUE,
+    solution BLOB NOT NULL,
+    source_id TEXT,
+    PRIMARY KEY (difficulty, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS puzzles_by_source_id ON puzzles (source_id);
+'''
+
+
+class PuzzleBank:
+    """
+    Represents an on-disk SQLite bank of puzzles and their solutions, each stored
+    as 41 bytes with two cells per byte. Within each difficulty the puzzles are
+    numbered densely from 0, so a random puzzle of a difficulty is a single
+    primary key lookup. Each puzzle keeps the id it has on the website it was
+    scraped from, which is unrelated to the ids of locally generated puzzles.
+    """
+
+    def __init__(self, path: str = 'puzzles.db') -> None:
+        """Opens the bank at the given path, creating it if needed."""
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+        self._lock = Lock()
+        self._counts = dict(self._connection.execute(
+            'SELECT difficulty, COUNT(*) FROM puzzles GROUP BY difficulty'))
+
+    def count(self, difficulty: str) -> int:
+        """Returns the number of puzzles of the given difficulty in the bank."""
+        return self._counts.get(difficulty, 0)
+
+    def add(self, difficulty: str, puzzle: [[int]], solution: [[int]], source_id: str) -> bool:
+        """
+        Adds the puzzle and its solution, scraped under the given source id, to
+        the bank under the given difficulty. Returns False if the bank already had
+        the puzzle.
+        """
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                'INSERT OR IGNORE INTO puzzles VALUES (?, ?, ?, ?, ?)',
+                (difficulty, self.count(difficulty), pack(puzzle), pack(solution), source_id))
+            if cursor.rowcount == 0:
+                return False
+            self._counts[difficulty] = self.count(difficulty) + 1
+            return True
+
+    def sample(self, difficulty: str, rng: random.Random = random) -> ([[int]], [[int]], str):
+        """
+        Returns a random (puzzle, solution, source id) triple of the given
+        difficulty, or None if the bank has none.
+        """
+        with self._lock:
+            if self.count(difficulty) == 0:
+                return None
+            row = self._connection.execute(
+                'SELECT puzzle, solution, source_id FROM puzzles WHERE difficulty = ? AND position = ?',
+                (difficulty, rng.randrange(self.count(difficulty)))).fetchone()
+        puzzle, solution, source_id = row
+        return to_board(unpack(puzzle)), to_board(unpack(solution)), source_id
+
+    def find(self, source_id: str) -> ([[int]], [[int]], str):
+        """
+        Returns the (puzzle, solution, difficulty) triple banked under the given
+        source id, or None if there is none.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT puzzle, solution, difficulty FROM puzzles WHERE source_id = ?', (source_id,)).fetchone()
+        if row is None:
+            return None
+        puzzle, solution, difficulty = row
+        return to_board(unpack(puzzle)), to_board(unpack(solution)), difficulty
+
+    def close(self) -> None:
+        """Closes the connection to the bank."""
+        with self._lock:
+            self._connection.close()
+
+
+def refill_from_web(bank: PuzzleBank, difficulty: str, count: int, base_url: str = BASE_URL) -> int:
+    """
+    Scrapes up to count puzzles of the given difficulty concurrently and adds
+    them to the bank. Returns the number of puzzles that were new to the bank.
+    """
+    async def fetch() -> [([[int]], [[int]], str)]:
+        async with AsyncScraper(base_url) as scraper:
+            return await scraper.fetch_many(difficulty, count)
+
+    return sum(bank.add(difficulty, *puzzle) for puzzle in asyncio.run(fetch()))
@@ -0,0 +1,82 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from os import cpu_count
+from sudoku_engines import ENGINES
+from sudoku_codec import to_bytes, to_string, to_board
+
+
+def _solve_chunk(puzzles: [bytes], engine: str) -> [bytes]:
+    """
+    Solves every 81-byte puzzle in the chunk. Returns the 81-byte solutions,
+    or None for the puzzles that have no solution.
+    """
+    solutions = []
+    for puzzle in puzzles:
+        solver = ENGINES[engine](puzzle)
+        solutions.append(solver.cells if solver.solve() else None)
+    return solutions
+
+
+def _chunks(puzzles: iter, chunk_size: int) -> iter:
+    """Yields lists of (position, puzzle) pairs with at most chunk_size puzzles each."""
+    numbered = enumerate(puzzles)
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _as_input_type(solution: bytes, puzzle: 'bytes | str | [[int]]') -> 'bytes | str | [[int]]':
+    """Returns the solution in the same form, bytes, string or board, as the given puzzle."""
+    if solution is None or isinstance(puzzle, bytes):
+        return solution
+    if isinstance(puzzle, str):
+        return to_string(solution)
+    return to_board(solution)
+
+
+def solve_many(puzzles: iter, workers: int = None, chunk_size: int = 64,
+               ordered: bool = True, engine: str = 'bitmask') -> iter:
+    """
+    Solves an iterable of puzzles, each an 81-character string ('0' or '.' for
+    the empty cells), 81 bytes or an NxN board, across a pool of worker processes.
+    Puzzles are sent to the workers as 81-byte chunks and only a few chunks per worker
+    are in flight at a time, so the input is consumed lazily.
+    If ordered is True, yields the solutions in input order; otherwise yields
+    (position, solution) pairs as soon as their chunk completes. Each solution has
+    the same form as its puzzle, or is None if the puzzle has no solution.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f'unknown solver engine: {engine!r}')
+    workers = workers or cpu_count() or 1
+    if workers == 1:
+        for position, puzzle in enumerate(puzzles):
+            solution = _solve_chunk([to_bytes(puzzle)], engine)[0]
+            solution = _as_input_type(solution, puzzle)
+            yield solution if ordered else (position, solution)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = _chunks(puzzles, chunk_size)
+        pending = {}
+        finished = {}
+        next_position = 0
+        while True:
+            for chunk in islice(chunks, 2 * workers - len(pending)):
+                encoded = [to_bytes(puzzle) for _, puzzle in chunk]
+                pending[executor.submit(_solve_chunk, encoded, engine)] = chunk
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                for (position, puzzle), solution in zip(chunk, future.result()):
+                    solution = _as_input_type(solution, puzzle)
+                    if ordered:
+                        finished[position] = solution
+                    else:
+                        yield position, solution
+            while next_position in finished:
+                yield finished.pop(next_position)
+                next_position += 1
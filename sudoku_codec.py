@@ -0,0 +1,65 @@
+from sudoku_units import SIZE, CELLS
+
+_FROM_ASCII = bytes.maketrans(b'0123456789', bytes(range(10)))
+_TO_ASCII = bytes.maketrans(bytes(range(10)), b'0123456789')
+_NIBBLES = tuple(bytes((byte >> 4, byte & 0xF)) for byte in range(256))
+
+PACKED_SIZE = (CELLS + 1) // 2
+
+
+def to_bytes(board: 'bytes | str | [int] | [[int]]') -> bytes:
+    """
+    Returns the board as 81 bytes, one per cell in row-major order, holding the
+    entry of the cell or 0 if it is empty.
+    """
+    if isinstance(board, bytes):
+        return board
+    if isinstance(board, str):
+        return board.replace('.', '0').encode('ascii').translate(_FROM_ASCII)
+    if len(board) == CELLS:
+        return bytes(board)
+    return bytes(entry for row in board for entry in row)
+
+
+def to_string(board: 'bytes | str | [[int]]') -> str:
+    """Returns the board as an 81-character string with '0' for the empty cells."""
+    if isinstance(board, str):
+        return board.replace('.', '0')
+    return to_bytes(board).translate(_TO_ASCII).decode('ascii')
+
+
+def to_board(puzzle: 'bytes | str') -> [[int]]:
+    """Returns the 81-byte or 81-character puzzle as an NxN board."""
+    return view(to_bytes(puzzle)).tolist()
+
+
+def cells_of(board: 'bytes | [int] | [[int]]') -> [int]:
+    """
+    Returns a new flat row-major list of the entries of the board, which is
+    either NxN or already flat, such as 81 bytes or an array of 81 entries.
+    """
+    if len(board) == CELLS:
+        return list(board)
+    return [entry for row in board for entry in row]
+
+
+def view(data: bytes) -> memoryview:
+    """
+    Returns a read-only NxN view of the 81-byte board that shares its memory,
+    indexed as view[row, col].
+    """
+    return memoryview(data).cast('B', (SIZE, SIZE))
+
+
+def pack(board: 'bytes | str | [[int]]') -> bytes:
+    """
+    Returns the board packed into 41 bytes with two cells per byte, the first
+    cell of each pair in the high nibble.
+    """
+    data = to_bytes(board)
+    return bytes(high << 4 | low for high, low in zip(data[0::2], data[1::2] + b'\0'))
+
+
+def unpack(packed: bytes) -> bytes:
+    """Returns the 81-byte board that was packed into the given 41 bytes."""
+    return b''.join(_NIBBLES[byte] for byte in packed)[:CELLS]
@@ -0,0 +1,211 @@
+from sudoku_units import SIZE, CELLS, ROW_OF, COL_OF, BOX_OF
+from sudoku_codec import cells_of
+
+_COLUMNS = 4 * CELLS
+_ROOT = 0
+
+
+def _build_template() -> ([int], [int], [int], [int], [int], [int], [int]):
+    """
+    Builds the exact cover matrix of an empty sudoku grid as toroidal doubly linked
+    lists stored in flat arrays. Node 0 is the root, nodes 1 to 324 are the column
+    headers and every candidate (cell, digit) adds a row of four nodes covering
+    its cell, row-digit, column-digit and block-digit constraints.
+    Returns the left, right, up, down, column, candidate and size arrays.
+    """
+    left = [_COLUMNS] + list(range(_COLUMNS))
+    right = list(range(1, _COLUMNS + 1)) + [_ROOT]
+    up = list(range(_COLUMNS + 1))
+    down = list(range(_COLUMNS + 1))
+    column = list(range(_COLUMNS + 1))
+    candidate = [-1] * (_COLUMNS + 1)
+    size = [0] * (_COLUMNS + 1)
+    for index in range(CELLS):
+        for digit in range(SIZE):
+            first = len(left)
+            headers = (1 + index,
+                       1 + CELLS + ROW_OF[index] * SIZE + digit,
+                       1 + 2 * CELLS + COL_OF[index] * SIZE + digit,
+                       1 + 3 * CELLS + BOX_OF[index] * SIZE + digit)
+            for offset, header in enumerate(headers):
+                node = first + offset
+                left.append(first + (offset - 1) % 4)
+                right.append(first + (offset + 1) % 4)
+                up.append(up[header])
+                down.append(header)
+                down[up[header]] = node
+                up[header] = node
+                column.append(header)
+                candidate.append(index * SIZE + digit)
+                size[header] += 1
+    return left, right, up, down, column, candidate, size
+
+
+_LEFT, _RIGHT, _UP, _DOWN, _COLUMN, _CANDIDATE, _COLUMN_SIZE = _build_template()
+_FIRST_NODE = tuple(_COLUMNS + 1 + 4 * row for row in range(CELLS * SIZE))
+
+
+class DancingLinksSolver:
+    """
+    Represents a sudoku solver that treats the puzzle as an exact cover problem
+    and solves it with Knuth's Algorithm X on dancing links.
+    """
+
+    def __init__(self, board: 'bytes | [int] | [[int]]') -> None:
+        """Initializes the state of the solver from the given NxN or flat 81-cell board."""
+        self._cells = cells_of(board)
+        self._left, self._right = _LEFT[:], _RIGHT[:]
+        self._up, self._down = _UP[:], _DOWN[:]
+        self._size = _COLUMN_SIZE[:]
+        self._is_consistent = True
+        covered = set()
+        for index, entry in enumerate(self._cells):
+            if entry != 0:
+                node = _FIRST_NODE[index * SIZE + entry - 1]
+                for offset in range(4):
+                    header = _COLUMN[node + offset]
+                    if header in covered:
+                        self._is_consistent = False
+                    else:
+                        covered.add(header)
+                        self._cover(header)
+
+    @property
+    def board(self) -> [[int]]:
+        """Returns the current state of the solver's grid as an NxN board."""
+        return [self._cells[row:row + SIZE] for row in range(0, CELLS, SIZE)]
+
+    @property
+    def cells(self) -> bytes:
+        """Returns the current state of the solver's grid as 81 bytes in row-major order."""
+        return bytes(self._cells)
+
+    def forbid(self, coord: (int, int), entry: int) -> None:
+        """
+        Unlinks the row of the entry at the given empty cell from the matrix so
+        that no solution found afterwards places it there.
+        """
+        row, col = coord
+        index = row * SIZE + col
+        first = _FIRST_NODE[index * SIZE + entry - 1]
+        nodes = range(first, first + 4)
+        up, down, size = self._up, self._down, self._size
+        if self._cells[index] != 0 or any(down[up[node]] != node for node in nodes):
+            return
+        for node in nodes:
+            down[up[node]] = down[node]
+            up[down[node]] = up[node]
+            size[_COLUMN[node]] -= 1
+
+    def solve(self) -> bool:
+        """
+        Returns True if the grid was solved. On success the solver's grid holds
+        the solution, otherwise the grid is left unchanged.
+        """
+        self._limit = 1
+        self._found = 0
+        return self._is_consistent and self._search()
+
+    def count_solutions(self, limit: int = None) -> int:
+        """
+        Returns the number of solutions that the grid has. If a limit is given,
+        the search stops as soon as that many solutions have been found.
+        """
+        self._limit = limit
+        self._found = 0
+        if self._is_consistent:
+            self._search()
+        return self._found
+
+    def _cover(self, header: int) -> None:
+        """Removes the column and every row that intersects it from the matrix."""
+        left, right, up, down, size = self._left, self._right, self._up, self._down, self._size
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        row = down[header]
+        while row != header:
+            node = right[row]
+            while node != row:
+                down[up[node]] = down[node]
+                up[down[node]] = up[node]
+                size[_COLUMN[node]] -= 1
+                node = right[node]
+            row = down[row]
+
+    def _uncover(self, header: int) -> None:
+        """Restores the column and its rows, undoing _cover in reverse order."""
+        left, right, up, down, size = self._left, self._right, self._up, self._down, self._size
+        row = up[header]
+        while row != header:
+            node = left[row]
+            while node != row:
+                size[_COLUMN[node]] += 1
+                down[up[node]] = node
+                up[down[node]] = node
+                node = left[node]
+            row = up[row]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def _choose_column(self) -> int:
+        """Returns the uncovered column with the fewest remaining rows."""
+        right, size = self._right, self._size
+        best, best_size = _ROOT, CELLS
+        header = right[_ROOT]
+        while header != _ROOT:
+            if size[header] < best_size:
+                best, best_size = header, size[header]
+                if best_size <= 1:
+                    break
+            header = right[header]
+        return best
+
+    def _select_row(self, row: int) -> None:
+        """Covers every other column that the chosen row satisfies."""
+        node = self._right[row]
+        while node != row:
+            self._cover(_COLUMN[node])
+            node = self._right[node]
+
+    def _deselect_row(self, row: int) -> None:
+        """Uncovers the columns covered by _select_row in reverse order."""
+        node = self._left[row]
+        while node != row:
+            self._uncover(_COLUMN[node])
+            node = self._left[node]
+
+    def _search(self) -> bool:
+        """
+        Runs Algorithm X with an explicit stack of chosen rows. Returns True once
+        the number of solutions found reaches the limit, leaving the chosen rows
+        written into the grid.
+        """
+        down = self._down
+        stack = []
+        while True:
+            if self._right[_ROOT] == _ROOT:
+                self._found += 1
+                if self._limit is not None and self._found >= self._limit:
+                    for row in stack:
+                        index, digit = divmod(_CANDIDATE[row], SIZE)
+                        self._cells[index] = digit + 1
+                    return True
+            else:
+                header = self._choose_column()
+                self._cover(header)
+                if down[header] != header:
+                    stack.append(down[header])
+                    self._select_row(down[header])
+                    continue
+                self._uncover(header)
+            while stack:
+                row = stack.pop()
+                self._deselect_row(row)
+                header = _COLUMN[row]
+                if down[row] != header:
+                    stack.append(down[row])
+                    self._select_row(down[row])
+                    break
+                self._uncover(header)
+            else:
+                return False
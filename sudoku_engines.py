@@ -0,0 +1,4 @@
+from sudoku_solver import BitmaskSolver
+from sudoku_dlx import DancingLinksSolver
+
+ENGINES = {'bitmask': BitmaskSolver, 'dlx': DancingLinksSolver}
@@ -0,0 +1,74 @@
+from sudoku_solver import BitmaskSolver
+
+_WEIGHTS = {'hidden single': 1.5, 'naked single': 2.3, 'intersection': 2.8,
+            'naked pair': 3.0, 'hidden pair': 3.4, 'guess': 5.0}
+_DIFFICULTIES = (('easy', 2.3), ('medium', 3.4), ('hard', float('inf')))
+
+
+class Grade:
+    """
+    Represents the result of grading a puzzle: which techniques a human would
+    need to solve it, how many deductions each made and the resulting rating.
+    """
+
+    def __init__(self, steps: {str: int}, guesses: int) -> None:
+        """Initializes the grade from the deductions made by each technique."""
+        self._steps = steps
+        self._guesses = guesses
+
+    @property
+    def steps(self) -> {str: int}:
+        """
+        Returns the number of deductions each technique made: the cells filled by
+        the singles, the cells whose pencil marks the others narrowed and the
+        guesses of the search.
+        """
+        return self._steps
+
+    @property
+    def guesses(self) -> int:
+        """Returns the number of guesses needed after the techniques ran out."""
+        return self._guesses
+
+    @property
+    def rating(self) -> float:
+        """
+        Returns the weight of the hardest technique needed. Puzzles that need
+        guessing get half a point more for every guess, up to 10.
+        """
+        rating = max((_WEIGHTS[name] for name in self._steps), default=0.0)
+        if self._guesses:
+            rating = min(_WEIGHTS['guess'] + self._guesses / 2, 10.0)
+        return rating
+
+    @property
+    def difficulty(self) -> str:
+        """Returns 'easy', 'medium' or 'hard' based on the rating."""
+        return next(name for name, limit in _DIFFICULTIES if self.rating <= limit)
+
+
+def grade(board: [[int]]) -> Grade:
+    """
+    Grades the puzzle by solving it the way a human would: repeatedly applying
+    the easiest technique that makes progress. If the techniques run out before
+    the puzzle is solved, the rest is searched and the guesses are counted.
+    Returns None if the puzzle has no solution or more than one, since neither
+    is a valid puzzle. Techniques that complete the grid prove it unique, so
+    only puzzles that need guessing are searched for a second solution.
+    """
+    solver = BitmaskSolver(board)
+    steps = {}
+    while not solver.is_solved:
+        step = solver.step()
+        if step is None:
+            break
+        name, deductions = step
+        steps[name] = steps.get(name, 0) + deductions
+    if solver.is_solved:
+        return Grade(steps, 0)
+    if BitmaskSolver(solver.board).count_solutions(2) != 1:
+        return None
+    search = BitmaskSolver(solver.board)
+    search.solve()
+    steps['guess'] = search.guesses
+    return Grade(steps, max(search.guesses, 1))
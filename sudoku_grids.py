@@ -0,0 +1,73 @@
+import random
+from sudoku_units import SIZE, BLOCK_SIZE
+from sudoku_solver import BitmaskSolver
+
+# Seeds of base grids that no symmetry maps onto each other or onto the pattern grid,
+# since each has a different number of distinct block rows and block columns.
+_SEEDS = (1, 2, 3, 6, 7)
+
+
+def _pattern_grid() -> [[int]]:
+    """
+    Returns the canonical solved grid where every row is the previous one
+    shifted by a block width, or by one more cell at the start of each band.
+    """
+    return [[(BLOCK_SIZE * (row % BLOCK_SIZE) + row // BLOCK_SIZE + col) % SIZE + 1 for col in range(SIZE)]
+            for row in range(SIZE)]
+
+
+def _seeded_grid(seed: int) -> [[int]]:
+    """
+    Returns the solved grid that completes the three blocks on the diagonal,
+    each filled with an order of the digits drawn from the seed. Those blocks
+    share no row or column, so they always complete, and the solver is
+    deterministic, so the same seed always gives the same grid.
+    """
+    rng = random.Random(seed)
+    board = [[0] * SIZE for _ in range(SIZE)]
+    for start in range(0, SIZE, BLOCK_SIZE):
+        for offset, digit in enumerate(rng.sample(range(1, SIZE + 1), SIZE)):
+            board[start + offset // BLOCK_SIZE][start + offset % BLOCK_SIZE] = digit
+    solver = BitmaskSolver(board)
+    solver.solve()
+    return solver.board
+
+
+_BASE_GRIDS = [_pattern_grid()] + [_seeded_grid(seed) for seed in _SEEDS]
+
+
+def add_base_grid(grid: [[int]]) -> None:
+    """
+    Adds a solved grid to the cached pool of base grids that shuffled_grid
+    picks from, widening the set of grids it can produce.
+    """
+    _BASE_GRIDS.append([row[:] for row in grid])
+
+
+def _shuffled_lines(rng: random.Random) -> [int]:
+    """Returns a random order of the rows (or columns): the bands and the lines within each band."""
+    bands = list(range(BLOCK_SIZE))
+    rng.shuffle(bands)
+    lines = []
+    for band in bands:
+        offsets = list(range(BLOCK_SIZE))
+        rng.shuffle(offsets)
+        lines.extend(band * BLOCK_SIZE + offset for offset in offsets)
+    return lines
+
+
+def shuffled_grid(rng: random.Random = random) -> [[int]]:
+    """
+    Returns a new solved grid built from a randomly picked base grid by applying
+    the validity-preserving symmetries of sudoku: relabelling the digits, permuting
+    the bands and stacks, permuting the rows and columns within them and transposing.
+    """
+    base = rng.choice(_BASE_GRIDS)
+    digits = list(range(1, SIZE + 1))
+    rng.shuffle(digits)
+    rows = _shuffled_lines(rng)
+    cols = _shuffled_lines(rng)
+    grid = [[digits[base[row][col] - 1] for col in cols] for row in rows]
+    if rng.random() < 0.5:
+        grid = [list(col) for col in zip(*grid)]
+    return grid
@@ -1,4 +1,7 @@
 from sudoku import Sudoku
+from sudoku_pool import PuzzlePool
+from sudoku_bank import PuzzleBank, refill_from_web
+from sudoku_scraper import LEVELS, scrape_puzzle
 from sudoku_gui_board import Board
 from random import randint
 from labels import StrikesLabel, Label
@@ -7,8 +10,12 @@ import pygame
 import threading
 
 _FRAME_RATE = 60
+_IDLE_TIMEOUT = 500
+_JOB_DONE = pygame.USEREVENT
+_BACKGROUND_COLOR = (161, 255, 181)
 _INITIAL_HEIGHT = 756
 _INITIAL_WIDTH = 1200
+_LOW_WATER_MARK = 20
 
 
 class SudokuGUI:
@@ -19,11 +26,15 @@ class SudokuGUI:
         pygame.font.init()
         font = pygame.font.SysFont("comicsans", 27, True)
         self._game_state = Sudoku()
+        self._puzzle_pool = PuzzlePool()
+        self._puzzle_bank = PuzzleBank()
+        self._refilling = set()
         self._board = Board(self._game_state, font)
         self._running = True
         self._set_up_labels(font)
         self._set_up_buttons(font)
         self._touch_active = False
+        self._drawn = {}
 
     def _set_up_labels(self, font) -> None:
         """Sets up the labels for the game."""
@@ -34,23 +45,23 @@ class SudokuGUI:
 
     def _set_up_buttons(self, font) -> None:
         """Sets up the button for the game."""
-        scrape_easy_puzzle = (lambda: self._game_state.webscrape_puzzle(('easy', randint(1, 3))))
-        scrape_medium_puzzle = (lambda: self._game_state.webscrape_puzzle(('medium', randint(4, 6))))
-        scrape_hard_puzzle = (lambda: self._game_state.webscrape_puzzle(('hard', randint(7, 9))))
+        load_easy_puzzle = (lambda: self._load_banked_puzzle('easy'))
+        load_medium_puzzle = (lambda: self._load_banked_puzzle('medium'))
+        load_hard_puzzle = (lambda: self._load_banked_puzzle('hard'))
 
         self._solve_button = Button(830, 150, 150, 70, self._game_state.solve,
                                     (45, 117, 114), (52, 235, 229), 'Solve', font, 3)
 
-        self._generate_button = Button(830, 250, 150, 70, self._game_state.generate_puzzle,
+        self._generate_button = Button(830, 250, 150, 70, self._create_puzzle,
                                        (122, 23, 108), (235, 14, 205), "Create", font, 3)
 
-        self._easy_button = Button(1000, 150, 150, 70, scrape_easy_puzzle,
+        self._easy_button = Button(1000, 150, 150, 70, load_easy_puzzle,
                                    (34, 97, 9), (119, 250, 67), 'Easy', font, 3)
 
-        self._medium_button = Button(1000, 250, 150, 70, scrape_medium_puzzle,
+        self._medium_button = Button(1000, 250, 150, 70, load_medium_puzzle,
                                      (138, 47, 94), (255, 122, 191), 'Medium', font, 3)
 
-        self._hard_button = Button(1000, 350, 150, 70, scrape_hard_puzzle,
+        self._hard_button = Button(1000, 350, 150, 70, load_hard_puzzle,
                                    (138, 6, 6), (255, 77, 77), "Hard", font, 3)
 
         self._solve_button.set_text_position(5, 3)
@@ -58,6 +69,49 @@ class SudokuGUI:
         self._easy_button.set_text_position(5, 3)
         self._medium_button.set_text_position(9, 3)
         self._hard_button.set_text_position(5, 3)
+        self._widgets = ((self._board, lambda surface: self._board.draw_board()),
+                         (self._strikes_label, self._strikes_label.draw_display),
+                         (self._solve_button, self._solve_button.draw_button),
+                         (self._generate_button, self._generate_button.draw_button),
+                         (self._easy_button, self._easy_button.draw_button),
+                         (self._medium_button, self._medium_button.draw_button),
+                         (self._hard_button, self._hard_button.draw_button),
+                         (self._label, self._label.draw_display))
+
+    def _create_puzzle(self) -> None:
+        """
+        Loads a puzzle that was generated in the background, and only generates
+        one on the spot if none is ready yet.
+        """
+        puzzle = self._puzzle_pool.get()
+        if puzzle is None:
+            self._game_state.generate_puzzle()
+        else:
+            self._game_state.load_puzzle(*puzzle)
+
+    def _load_banked_puzzle(self, difficulty: str) -> None:
+        """
+        Loads a random puzzle of the given difficulty from the local bank, and only
+        scrapes one from the web if the bank has none. The bank is topped up in the
+        background whenever it runs low.
+        """
+        banked = self._puzzle_bank.sample(difficulty)
+        if banked is None:
+            puzzle, solution, source_id = scrape_puzzle((difficulty, randint(*LEVELS[difficulty])))
+            self._puzzle_bank.add(difficulty, puzzle, solution, source_id)
+        else:
+            puzzle, solution, _ = banked
+        self._game_state.load_puzzle(puzzle, solution)
+        if self._puzzle_bank.count(difficulty) < _LOW_WATER_MARK and difficulty not in self._refilling:
+            self._refilling.add(difficulty)
+            threading.Thread(target=self._refill_bank, args=(difficulty,), daemon=True).start()
+
+    def _refill_bank(self, difficulty: str) -> None:
+        """Scrapes puzzles of the given difficulty into the bank to bring it back up to its low-water mark."""
+        try:
+            refill_from_web(self._puzzle_bank, difficulty, _LOW_WATER_MARK - self._puzzle_bank.count(difficulty))
+        finally:
+            self._refilling.discard(difficulty)
 
     def _set_states(self) -> None:
         if self._game_state.is_generating or self._game_state.is_solving:
@@ -78,42 +132,60 @@ class SudokuGUI:
 
     def _is_completed(self) -> bool:
         """Returns True if the user solved the board himself."""
-        if self._game_state.zeros is not None:
-            return len(self._board.user_moves) == self._game_state.zeros
+        zeros = self._game_state.snapshot.zeros
+        if zeros is not None:
+            return len(self._board.user_moves) == zeros
         return False
 
     def run_game(self) -> None:
-        """Runs the game."""
+        """
+        Runs the game. The loop sleeps until an event arrives, waking up at least
+        every so often, or every frame while a puzzle is being generated or solved,
+        to pick up changes made by the background jobs.
+        """
         try:
             pygame.init()
             pygame.display.set_caption("SUDOKU")
-            clock = pygame.time.Clock()
             pygame.display.set_mode((_INITIAL_WIDTH, _INITIAL_HEIGHT))
+            self._redraw(is_full=True)
             while self._running:
-                clock.tick(_FRAME_RATE)
-                self._set_states()                
-                self._handle_events()
+                is_busy = self._game_state.is_generating or self._game_state.is_solving
+                events = [pygame.event.wait(1000 // _FRAME_RATE if is_busy else _IDLE_TIMEOUT)]
+                events.extend(pygame.event.get())
+                self._set_states()
+                is_exposed = self._handle_events(events)
                 self._strikes_label.strikes = self._board.strikes % (3 + 1)
-                self._redraw()
+                self._redraw(is_full=is_exposed)
         finally:
+            self._running = False
+            self._puzzle_pool.close()
+            self._puzzle_bank.close()
             pygame.quit()
 
-    def _handle_events(self) -> None:
-        """Handles all the events that occur during the game."""
+    def _handle_events(self, events: [pygame.event.Event]) -> bool:
+        """
+        Handles all the events that occur during the game. Returns True if the
+        window needs to be redrawn in full.
+        """
+        is_exposed = False
+        strikes = self._board.strikes
         mouse_position = pygame.mouse.get_pos()
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 self._end_game()
             if event.type == pygame.MOUSEBUTTONDOWN:
                 self._handle_mouse_clicks(mouse_position)
             if event.type == pygame.KEYDOWN:
                 self._handle_key_presses(event.key)
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                is_exposed = True
             self._handle_button_commands(mouse_position)
-        if self._board.strikes == 3:
+        if self._board.strikes == 3 and strikes != 3:
             self._game_state.solve()
             self._label.text = "YOU LOST!"
-        if self._game_state.is_full() and self._is_completed():
+        if not self._game_state.snapshot.open_cells and self._is_completed():
             self._label.text = 'YOU WON!'
+        return is_exposed
 
     def _handle_button_commands(self, position: (int, int)) -> None:
         """Handles all the button commands."""
@@ -149,7 +221,7 @@ class SudokuGUI:
             self._board.enter_entry()
         elif event == pygame.K_BACKSPACE:
             self._board.delete_entry()
-        elif not self._game_state.is_full():
+        elif self._game_state.snapshot.open_cells:
             print('click breaks this board')
             if self._touch_active and event == pygame.K_UP:
                 self._board.change_direction(-1, 0)
@@ -167,25 +239,34 @@ class SudokuGUI:
             cell_width, cell_height = self._board.cell_size
             self._board.selected_cell = (row // cell_width, col // cell_height)
         if self._solve_button.is_mouse_on_button(position):
-            solve = threading.Thread(target=self._solve_button.execute)
-            solve.start()
+            self._start_job(self._solve_button.execute)
         if self._generate_button.is_mouse_on_button(position):
-            generate = threading.Thread(target=self._generate_button.execute)
-            generate.start()
+            self._start_job(self._generate_button.execute)
             self._set_game()
         if self._easy_button.is_mouse_on_button(position):
-            generate = threading.Thread(target=self._easy_button.execute)
-            generate.start()
+            self._start_job(self._easy_button.execute)
             self._set_game()
         if self._medium_button.is_mouse_on_button(position):
-            generate = threading.Thread(target=self._medium_button.execute)
-            generate.start()
+            self._start_job(self._medium_button.execute)
             self._set_game()
         if self._hard_button.is_mouse_on_button(position):
-            generate = threading.Thread(target=self._hard_button.execute)
-            generate.start()
+            self._start_job(self._hard_button.execute)
             self._set_game()
 
+    def _start_job(self, command: callable) -> None:
+        """
+        Runs the command in a background thread, which wakes the game loop up
+        with an event when it finishes.
+        """
+        def run() -> None:
+            try:
+                command()
+            finally:
+                if pygame.display.get_init():
+                    pygame.event.post(pygame.event.Event(_JOB_DONE))
+
+        threading.Thread(target=run).start()
+
     def _set_game(self) -> None:
         """Sets up the basic requirements in order for the user to play."""
         self._board.strikes = 0
@@ -198,23 +279,35 @@ class SudokuGUI:
         """Ends the game."""
         self._running = False
 
-    def _redraw(self) -> None:
-        """Draws the current state of the GUI."""
+    def _redraw(self, is_full: bool = False) -> None:
+        """
+        Draws the widgets whose appearance changed since they were last drawn and
+        updates only their areas of the window, which for the board are just the
+        cells that changed unless the whole board did. If is_full is True, the
+        whole window is redrawn instead.
+        """
         surface = pygame.display.get_surface()
         self._board.update_game(self._game_state)
         self._board.set_board_dimensions(surface)
-        background_color = (161, 255, 181)
-        surface.fill(background_color)
-        self._board.draw_board()
-        self._strikes_label.draw_display(surface)
-        self._solve_button.draw_button(surface)
-        self._generate_button.draw_button(surface)
-        self._easy_button.draw_button(surface)
-        self._medium_button.draw_button(surface)
-        self._hard_button.draw_button(surface)
-        self._label.draw_display(surface)
-        pygame.display.flip()
-
+        if is_full:
+            surface.fill(_BACKGROUND_COLOR)
+            self._drawn.clear()
+        dirty_rects = []
+        for widget, draw in self._widgets:
+            appearance = widget.appearance
+            drawn = self._drawn.get(widget)
+            if drawn == appearance:
+                continue
+            rects = self._board.dirty_rects(drawn) if widget is self._board else [widget.rect]
+            for rect in rects:
+                surface.fill(_BACKGROUND_COLOR, rect)
+            draw(surface)
+            self._drawn[widget] = appearance
+            dirty_rects.extend(rects)
+        if is_full:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
 
 if __name__ == '__main__':
     game = SudokuGUI()
@@ -1,4 +1,7 @@
 import pygame
+from text_cache import render_text
+
+_LINE_OVERHANG = 2
 
 
 class Board:
@@ -12,6 +15,11 @@ class Board:
         self.strikes = 0  # number of times user has entered a wrong input
         self._font = font
         self.is_clickable = False
+        self._layer_size = None
+        self._grid_layer = None
+        self._clue_layer = None
+        self._clue_version = None
+        self._snapshot = None
 
     @property
     def is_clickable(self) -> bool:
@@ -58,12 +66,13 @@ class Board:
 
     def change_direction(self, dx: int, dy: int) -> None:
         if self.selected_cell == (None, None):
-            self.selected_cell = min(self._game.pencil_marks, default=(None, None))
+            self.selected_cell = min(self._game.snapshot.open_cells, default=(None, None))
         else:
             x, y = self.selected_cell
+            open_cells = self._game.snapshot.open_cells
             while True:
                 new_coord = ((x + dx) % 9, (y + dy) % 9)
-                if new_coord in self._game.pencil_marks:
+                if new_coord in open_cells:
                     break
                 x += dx
                 y += dy
@@ -76,7 +85,8 @@ class Board:
 
     def set_board_dimensions(self, surface: pygame.surface) -> None:
         """
-        Sets the dimensions of the sudoku board.
+        Sets the dimensions of the sudoku board. The pre-rendered layers are
+        dropped if the size of the board changed.
         """
         self._surface = surface
         self._x, self._y = 0, 0
@@ -85,6 +95,10 @@ class Board:
         self._height = self._surface.get_height()
         self._dimension = pygame.Rect((self._x, self._y, self._width, self._height))
         self.cell_size = (self._width, self._height)
+        if self._layer_size != (self._width, self._height):
+            self._layer_size = (self._width, self._height)
+            self._grid_layer = None
+            self._clue_layer = None
 
     @cell_size.setter
     def cell_size(self, dimension: (int, int)) -> None:
@@ -93,15 +107,75 @@ class Board:
         self._cell_width = width // 9
         self._cell_height = height // 9
 
+    @property
+    def rect(self) -> pygame.Rect:
+        """Returns the area of the window that the board draws on, including the overhang of its lines."""
+        return pygame.Rect(self._x, self._y, self._width + _LINE_OVERHANG, self._height + _LINE_OVERHANG)
+
+    @property
+    def appearance(self) -> tuple:
+        """Returns everything that the drawing of the board depends on, so it only needs redrawing when this changes."""
+        return (self._layer_size, self._game.snapshot.version,
+                self.selected_cell if self.is_clickable else None, tuple(self._user_moves.items()))
+
+    def dirty_rects(self, drawn: tuple) -> [pygame.Rect]:
+        """
+        Returns the areas of the window that changed since the board was drawn
+        with the given appearance. A new size or snapshot changes the whole board,
+        while a new selection or user entry only changes the cells involved.
+        """
+        size, version, selected_cell, moves = self.appearance
+        if drawn is None or drawn[:2] != (size, version):
+            return [self.rect]
+        cells = {coord for coord, _ in dict(moves).items() ^ dict(drawn[3]).items()}
+        if selected_cell != drawn[2]:
+            cells.update((selected_cell, drawn[2]))
+        return [self._cell_rect(cell) for cell in cells if cell not in (None, (None, None))]
+
+    def _cell_rect(self, coord: (int, int)) -> pygame.Rect:
+        """Returns the area of the cell at the given coordinate, including the lines around it."""
+        row, col = coord
+        cell_width, cell_height = self.cell_size
+        rect = pygame.Rect(self._x + col * cell_width, self._y + row * cell_height, cell_width, cell_height)
+        return rect.inflate(2 * _LINE_OVERHANG, 2 * _LINE_OVERHANG)
+
     def draw_board(self) -> None:
-        """Draws the sudoku game board onto the pygame window."""
-        pygame.draw.rect(self._surface, (255, 255, 255), self._dimension)
+        """
+        Draws the sudoku game board onto the pygame window by compositing its
+        layers: the clue layer, which is only re-rendered when the clues change,
+        then the selected cell and the user's entries, then the cached grid lines.
+        The whole frame is drawn from one snapshot of the game, read without locks.
+        """
+        self._snapshot = self._game.snapshot
+        if self._grid_layer is None:
+            self._grid_layer = self._render_grid_layer()
+        if self._clue_layer is None or self._snapshot.version != self._clue_version:
+            self._clue_layer = self._render_clue_layer()
+            self._clue_version = self._snapshot.version
+        self._surface.blit(self._clue_layer, self._dimension)
         self._draw_selected_cell()
-        self._draw_clues()
-        self._draw_rows()
-        self._draw_columns()
+        self._draw_user_moves()
+        self._surface.blit(self._grid_layer, self._dimension.topleft)
+
+    def _render_grid_layer(self) -> pygame.Surface:
+        """
+        Returns a transparent layer with the lines of the board drawn on it. The
+        layer overhangs the board so that the thick outer lines are not cut off.
+        """
+        width, height = self._layer_size
+        layer = pygame.Surface((width + _LINE_OVERHANG, height + _LINE_OVERHANG), pygame.SRCALPHA)
+        self._draw_rows(layer)
+        self._draw_columns(layer)
+        return layer
 
-    def _draw_rows(self) -> None:
+    def _render_clue_layer(self) -> pygame.Surface:
+        """Returns a layer with the white board and its locked cells and clues drawn on it."""
+        layer = pygame.Surface(self._layer_size)
+        layer.fill((255, 255, 255))
+        self._draw_clues(layer)
+        return layer
+
+    def _draw_rows(self, surface: pygame.Surface) -> None:
         """Draws the rows of the board."""
         x, y = self._x, self._y
         for row in range(1, 10):
@@ -109,14 +183,14 @@ class Board:
             line_width = 3 if row % 3 == 0 else 1
             start_point = (x, y)
             end_point = (self._width, y)
-            self._draw_line(start_point, end_point, line_width)
+            self._draw_line(surface, start_point, end_point, line_width)
 
-    def _draw_line(self, start: (int, int), end: (int, int), width: int) -> None:
+    def _draw_line(self, surface: pygame.Surface, start: (int, int), end: (int, int), width: int) -> None:
         """Draws the line at the given coordinate."""
         black = (0, 0, 0)
-        pygame.draw.line(self._surface, black, start, end, width)
+        pygame.draw.line(surface, black, start, end, width)
 
-    def _draw_columns(self) -> None:
+    def _draw_columns(self, surface: pygame.Surface) -> None:
         """Draws the columns of the board."""
         x, y = self._x, self._y
         for col in range(1, 10):
@@ -124,7 +198,7 @@ class Board:
             line_width = 3 if col % 3 == 0 else 1
             start_point = (x, y)
             end_point = (x, self._height)
-            self._draw_line(start_point, end_point, line_width)
+            self._draw_line(surface, start_point, end_point, line_width)
 
     def _draw_selected_cell(self):
         """
@@ -133,37 +207,41 @@ class Board:
         """
         self.selected_cell = self.selected_cell if self.is_clickable else (None, None)
         x, y = self.selected_cell
-        if self.selected_cell in self._game.pencil_marks:
+        if self.selected_cell in self._snapshot.open_cells:
             light_blue = (48, 238, 255)
             cell_width, cell_height = self.cell_size
             pygame.draw.rect(self._surface, light_blue, (y * cell_width, x * cell_height, cell_width, cell_height))
 
     def input_move(self, entry: int) -> None:
         """Inputs the number onto the board's surface."""
-        if self.selected_cell in self._game.pencil_marks:
+        if self.selected_cell in self._game.snapshot.open_cells:
             self._user_moves[self._selected_cell] = entry
 
-    def _draw_clues(self) -> None:
-        """Draws all the clues onto the board's surface."""
-        x, y = self._x, self._y
+    def _clue_position(self, coord: (int, int)) -> (int, int, int, int):
+        """Returns where the clue of the cell at the given coordinate is drawn."""
+        row, col = coord
         cell_width, cell_height = self.cell_size
-        y_point = (y + cell_height) // 3 + 3
-        for row_pos, row in enumerate(self._game.board):
-            x_point = (x + cell_width) // 3 + 3
+        x_point = (self._x + cell_width) // 3 + 3 + col * cell_width
+        y_point = (self._y + cell_height) // 3 + 3 + row * cell_height
+        return x_point, y_point, cell_width // 3, cell_height // 3
+
+    def _draw_clues(self, surface: pygame.Surface) -> None:
+        """Draws all the clues onto the given surface."""
+        for row_pos, row in enumerate(self._snapshot.board):
             for col_pos, entry in enumerate(row):
-                position = (x_point, y_point, cell_width // 3, cell_height // 3)
-                if (row_pos, col_pos) not in self._game.pencil_marks and entry != 0:
-                    self._fill_locked_cell((row_pos, col_pos))
-                    self._display_clue(entry, position)
-                elif (row_pos, col_pos) in self._user_moves:
-                    entry = self._user_moves[(row_pos, col_pos)]
-                    self._display_clue(entry, position, (156, 156, 156))
-                x_point += cell_width
-            y_point += cell_height
+                if (row_pos, col_pos) not in self._snapshot.open_cells and entry != 0:
+                    self._fill_locked_cell(surface, (row_pos, col_pos))
+                    self._display_clue(surface, entry, self._clue_position((row_pos, col_pos)))
+
+    def _draw_user_moves(self) -> None:
+        """Draws the entries that the user typed into the open cells onto the board's surface."""
+        for coord, entry in self._user_moves.items():
+            if coord in self._snapshot.open_cells:
+                self._display_clue(self._surface, entry, self._clue_position(coord), (156, 156, 156))
 
     def delete_entry(self) -> None:
         """Deletes the entry that the user entered on the selected cell."""
-        if self.selected_cell in self._game.pencil_marks \
+        if self.selected_cell in self._game.snapshot.open_cells \
                 and self.selected_cell in self._user_moves:
             self._user_moves.pop(self.selected_cell)
 
@@ -173,21 +251,22 @@ class Board:
         if entry and not self._game.valid_move(self.selected_cell, entry):
             self.strikes += 1
 
-    def _fill_locked_cell(self, position: (int, int)) -> None:
+    def _fill_locked_cell(self, surface: pygame.Surface, position: (int, int)) -> None:
         """
         These cells are filled in grey to indicate that these clues 
         were already present since the beginning of the game.
         """
         x, y = position
         cell_width, cell_height = self.cell_size
-        pygame.draw.rect(self._surface, (180, 180, 180), ((y * cell_width), (x * cell_height), cell_width, cell_height))
+        pygame.draw.rect(surface, (180, 180, 180), ((y * cell_width), (x * cell_height), cell_width, cell_height))
 
-    def _display_clue(self, clue: int, position: (int, int), color: (int,) = None) -> None:
-        """Draws the available clue onto the board."""
-        clue = '' if self._game.is_generating else clue
+    def _display_clue(self, surface: pygame.Surface, clue: int, position: (int, int),
+                      color: (int,) = None) -> None:
+        """Draws the available clue onto the given surface."""
+        clue = '' if self._snapshot.is_generating else clue
         color = (0, 0, 0) if color is None else color
-        text = self._font.render(str(clue), True, color)
-        self._surface.blit(text, position)
+        text = render_text(self._font, str(clue), color)
+        surface.blit(text, position)
 
     def is_board_clicked(self, position: (int, int)) -> bool:
         """Returns True if the board was clicked on."""
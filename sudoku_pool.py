@@ -0,0 +1,73 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from random import SystemRandom
+from threading import RLock
+from sudoku import Sudoku
+from sudoku_codec import to_bytes, to_board
+
+
+def _generate_puzzle(seed: int) -> (bytes, bytes, str):
+    """
+    Generates the puzzle for the given seed in a worker process and returns it
+    with its solution as 81 bytes each, along with its puzzle id.
+    """
+    sudoku = Sudoku()
+    sudoku.generate_puzzle(seed)
+    return to_bytes(sudoku.board), to_bytes(sudoku.solution), sudoku.puzzle_id
+
+
+class PuzzlePool:
+    """
+    Represents a bounded queue of ready-to-play puzzles that worker processes
+    keep refilling in the background.
+    """
+
+    def __init__(self, capacity: int = 5, workers: int = 1) -> None:
+        """Initializes the pool and starts generating puzzles to fill it."""
+        self._capacity = capacity
+        self._ready = deque()
+        self._pending = 0
+        self._is_closed = False
+        self._lock = RLock()
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        self._seeds = SystemRandom()
+        self._refill()
+
+    def __len__(self) -> int:
+        """Returns the number of puzzles that are ready."""
+        return len(self._ready)
+
+    def get(self) -> ([[int]], [[int]], str):
+        """
+        Returns a (puzzle, solution, puzzle id) triple from the queue, or None if
+        no puzzle is ready yet. Either way, generation of replacements is started.
+        """
+        puzzle = self._ready.popleft() if self._ready else None
+        self._refill()
+        if puzzle is None:
+            return None
+        board, solution, puzzle_id = puzzle
+        return to_board(board), to_board(solution), puzzle_id
+
+    def close(self) -> None:
+        """Stops the worker processes and discards the puzzles still being generated."""
+        with self._lock:
+            self._is_closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _refill(self) -> None:
+        """Submits enough generation jobs to bring the pool back to its capacity."""
+        with self._lock:
+            if self._is_closed:
+                return
+            for _ in range(self._capacity - len(self._ready) - self._pending):
+                self._pending += 1
+                seed = self._seeds.getrandbits(64)
+                self._executor.submit(_generate_puzzle, seed).add_done_callback(self._add_puzzle)
+
+    def _add_puzzle(self, future: Future) -> None:
+        """Moves a finished puzzle into the ready queue."""
+        with self._lock:
+            self._pending -= 1
+            if not future.cancelled() and future.exception() is None and not self._is_closed:
+                self._ready.append(future.result())
@@ -1,60 +1,432 @@
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
 from re import search
-import urllib.request
-import urllib.error
+from random import randint
+from urllib.parse import urljoin, urlsplit
+import asyncio
+from sudoku_solver import BitmaskSolver
+from sudoku_codec import to_board
 
+BASE_URL = 'http://www.menneske.no/sudoku/eng/'
+LEVELS = {'easy': (1, 3), 'medium': (4, 6), 'hard': (7, 9)}
+_PUZZLE_ID = r'(\d{2,})'
+_SIZE = 9
+_REDIRECT_STATUSES = ('301', '302', '307', '308')
+_MAX_REDIRECTS = 5
 
-def _get_puzzle_id(soup: BeautifulSoup) -> str:
-    """Returns the id number of the puzzle."""
 
-    grid = soup.find_all('div', 'grid')[0].text
-    return search(r'(\d{2,})', grid).group(1).strip()
+class ScrapeError(Exception):
+    """Raised when a page cannot be fetched within the retry cap, or does not exist."""
+    pass
 
 
-def _get_url(response: str, id_number: int) -> str:
-    """Returns the correct url based on the given response."""
+class _ServerError(ScrapeError):
+    """Raised when the website answers with a 5xx status, which is worth retrying."""
+    pass
+
+
+class _MalformedResponse(ScrapeError):
+    """Raised when the status line, a header or a chunk size of a response cannot be parsed."""
+    pass
+
+
+_RETRIABLE_ERRORS = (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, _ServerError, _MalformedResponse)
+
+
+class AsyncScraper:
+    """
+    Represents an asyncio client for the puzzle website that keeps a pool of
+    keep-alive HTTP/1.1 connections to it. At most `connections` requests run at
+    a time; each attempt is bounded by a timeout and failed attempts are retried
+    with exponential backoff up to a retry cap.
+    """
+
+    def __init__(self, base_url: str = BASE_URL, connections: int = 4, timeout: float = 10.0,
+                 retries: int = 4, backoff: float = 0.5) -> None:
+        """Initializes the scraper. No connection is opened until a page is fetched."""
+        parts = urlsplit(base_url)
+        self._base_url = base_url
+        self._host = parts.hostname
+        self._is_secure = parts.scheme == 'https'
+        self._port = parts.port or (443 if self._is_secure else 80)
+        self._timeout = timeout
+        self._retries = retries
+        self._backoff = backoff
+        self._slots = asyncio.Semaphore(connections)
+        self._idle = []
+
+    async def __aenter__(self) -> 'AsyncScraper':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Closes every idle connection in the pool."""
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    async def fetch(self, path: str) -> bytes:
+        """
+        Returns the body of the page at the path, relative to the base url.
+        Redirects (301, 302, 307 and 308) are followed up to a small cap as long
+        as they stay on the host of the base url, since the pool only connects
+        to it. Raises ScrapeError once the retry or redirect cap is reached, or
+        if the page redirects to another host.
+        """
+        url = urljoin(self._base_url, path)
+        for _ in range(_MAX_REDIRECTS + 1):
+            body, location = await self._fetch_once(url)
+            if location is None:
+                return body
+            url = self._follow(url, location)
+        raise ScrapeError(f'{urljoin(self._base_url, path)} redirected more than {_MAX_REDIRECTS} times')
+
+    async def _fetch_once(self, url: str) -> (bytes, str):
+        """
+        Returns the body of the response for the url and the location it
+        redirects to, or None if it does not redirect, retrying failed attempts.
+        """
+        target = urlsplit(url)
+        target = target.path + ('?' + target.query if target.query else '')
+        for attempt in range(self._retries + 1):
+            try:
+                return await self._get(target)
+            except _RETRIABLE_ERRORS as error:
+                if attempt == self._retries:
+                    raise ScrapeError(f'could not fetch {url} after {attempt + 1} attempts') from error
+                await asyncio.sleep(self._backoff * 2 ** attempt)
+
+    def _follow(self, url: str, location: str) -> str:
+        """
+        Returns the absolute url that the url redirects to, or raises ScrapeError
+        if it is on another scheme, host or port than the base url.
+        """
+        redirect = urljoin(url, location)
+        parts = urlsplit(redirect)
+        is_secure = parts.scheme == 'https'
+        if (parts.scheme not in ('http', 'https') or is_secure != self._is_secure or parts.hostname != self._host
+                or (parts.port or (443 if is_secure else 80)) != self._port):
+            raise ScrapeError(f'{url} redirects to {redirect}, which is not on {self._base_url}')
+        return redirect
+
+    async def fetch_puzzle(self, level: int, cross_check: bool = False) -> ([[int]], [[int]], str):
+        """
+        Returns a random (puzzle, solution, puzzle id) triple of the given
+        difficulty level from the website. Only the puzzle page is fetched and
+        the solution is found by the local solver, which also checks that it is
+        unique. The solution page is fetched if the puzzle does not have a unique
+        solution, or to cross-check the local solution if cross_check is True.
+        """
+        puzzle, puzzle_id = _parse_puzzle_page(await self.fetch(_get_path('random', level)))
+        solution = solve_locally(puzzle)
+        if solution is None or cross_check:
+            remote_solution, _ = parse_page(await self.fetch(_get_path('solution', int(puzzle_id))))
+            if solution is not None and solution != remote_solution:
+                raise ScrapeError(f'the solution page of puzzle {puzzle_id} disagrees with its unique solution')
+            solution = remote_solution
+        return puzzle, solution, puzzle_id
+
+    async def fetch_many(self, difficulty: str, count: int, cross_check: bool = False) -> [([[int]], [[int]], str)]:
+        """
+        Returns up to count distinct (puzzle, solution, puzzle id) triples of the
+        given difficulty ('easy', 'medium' or 'hard'), fetched concurrently. Since
+        the website serves random puzzles, repeats are dropped and replaced, for at
+        most a few rounds. Puzzles that fail to fetch are skipped. See fetch_puzzle
+        for cross_check.
+        """
+        found = {}
+        for _ in range(3):
+            missing = count - len(found)
+            if missing <= 0:
+                break
+            results = await asyncio.gather(*(self.fetch_puzzle(randint(*LEVELS[difficulty]), cross_check)
+                                             for _ in range(missing)), return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    if not isinstance(result, ScrapeError):
+                        raise result
+                elif len(found) < count:
+                    found.setdefault(result[2], result)
+        return list(found.values())
+
+    async def _get(self, target: str) -> (bytes, str):
+        """
+        Sends one GET request for the target over a pooled connection, or over a
+        new one if the pooled connection turns out to have been closed. Returns
+        the body and the redirect location, if any.
+        """
+        async with self._slots:
+            if self._idle:
+                try:
+                    return await self._exchange(self._idle.pop(), target)
+                except (OSError, asyncio.IncompleteReadError):
+                    pass
+            connection = await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port, ssl=self._is_secure or None), self._timeout)
+            return await self._exchange(connection, target)
+
+    async def _exchange(self, connection: (asyncio.StreamReader, asyncio.StreamWriter),
+                        target: str) -> (bytes, str):
+        """
+        Sends the request over the connection and reads the response, returning
+        the connection to the pool if the server keeps it alive.
+        """
+        reader, writer = connection
+        try:
+            body, location, keep_alive = await asyncio.wait_for(
+                self._request(reader, writer, target), self._timeout)
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            self._idle.append(connection)
+        else:
+            writer.close()
+        return body, location
+
+    async def _request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                       target: str) -> (bytes, str, bool):
+        """
+        Returns the body of the response, the location it redirects to or None,
+        and whether the connection can be reused.
+        """
+        writer.write(f'GET {target} HTTP/1.1\r\nHost: {self._host}\r\n'
+                     f'Accept-Encoding: identity\r\nConnection: keep-alive\r\n\r\n'.encode('ascii'))
+        await writer.drain()
+        status_line = (await reader.readuntil(b'\r\n')).decode('latin-1').split(' ', 2)
+        if len(status_line) < 2 or not status_line[1].isdigit():
+            raise _MalformedResponse(f'{target} answered with a malformed status line')
+        version, status = status_line[:2]
+        headers = {}
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = bytearray()
+            while True:
+                size = _parse_length(target, (await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                if size == 0:
+                    break
+                body += await reader.readexactly(size + 2)
+                del body[-2:]
+            while await reader.readuntil(b'\r\n') != b'\r\n':
+                pass
+            body = bytes(body)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(_parse_length(target, headers['content-length'], 10))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        if status.startswith('5'):
+            raise _ServerError(f'{target} answered with status {status}')
+        if status in _REDIRECT_STATUSES:
+            if 'location' not in headers:
+                raise ScrapeError(f'{target} answered with status {status} but no location')
+            return body, headers['location'], keep_alive
+        if status != '200':
+            raise ScrapeError(f'{target} answered with status {status}')
+        return body, None, keep_alive
+
+
+def _parse_length(target: str, text: 'bytes | str', base: int) -> int:
+    """Returns the chunk size or content length in the text, which must not be negative."""
+    try:
+        length = int(text, base)
+    except ValueError:
+        raise _MalformedResponse(f'{target} answered with a malformed length {text!r}') from None
+    if length < 0:
+        raise _MalformedResponse(f'{target} answered with a negative length {text!r}')
+    return length
+
+
+class _GridParser(HTMLParser):
+    """
+    Represents a streaming parser that pulls the grid and the puzzle id out of
+    a menneske.no page as the markup goes by, and stops as soon as it has both.
+    The id is the first number of two or more digits in a text node of the first
+    grid div that is outside every table cell, so the digits of the grid can never
+    be taken for it, and the grid is read from the cells of the table rows of class grid.
+    """
+
+    def __init__(self) -> None:
+        """Initializes the state of the parser."""
+        super().__init__()
+        self.grid = []
+        self.puzzle_id = None
+        self._div_depth = 0
+        self._is_div_done = False
+        self._td_depth = 0
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag: str, attrs: [(str, str)]) -> None:
+        """Tracks entering the grid div, a grid row or one of its cells."""
+        classes = (dict(attrs).get('class') or '').split()
+        if tag == 'td' and self._div_depth:
+            self._td_depth += 1
+        if tag == 'div' and self._div_depth:
+            self._div_depth += 1
+        elif tag == 'div' and not self._is_div_done and 'grid' in classes:
+            self._div_depth = 1
+        elif tag == 'tr' and 'grid' in classes:
+            self._row = []
+        elif tag == 'td' and self._row is not None:
+            self._cell = ''
+
+    def handle_endtag(self, tag: str) -> None:
+        """Finishes the cell, row or grid div that the tag closes."""
+        if tag == 'td' and self._td_depth:
+            self._td_depth -= 1
+        if tag == 'td' and self._cell is not None:
+            text = self._cell.strip()
+            self._row.append(int(text) if text else 0)
+            self._cell = None
+        elif tag == 'tr' and self._row is not None:
+            self.grid.append(self._row)
+            self._row = None
+        elif tag == 'div' and self._div_depth:
+            self._div_depth -= 1
+            if not self._div_depth:
+                self._is_div_done = True
+        if len(self.grid) == _SIZE and self.puzzle_id is not None:
+            raise _ParseDone
+
+    def handle_data(self, data: str) -> None:
+        """Collects the text of the current cell and of the grid div."""
+        if self._cell is not None:
+            self._cell += data
+        if self._div_depth and not self._td_depth and self.puzzle_id is None:
+            match = search(_PUZZLE_ID, data)
+            if match is not None:
+                self.puzzle_id = match.group(1)
+
+
+class _ParseDone(Exception):
+    """Raised by the streaming parser to stop once it has everything it needs."""
+    pass
+
+
+def parse_page(page: bytes) -> ([[int]], str):
+    """
+    Returns the grid of the puzzle or solution page and the puzzle id, or None
+    for the id if the page has none. The page is read by a streaming parser that
+    stops early; BeautifulSoup is only used if that fails to find a 9x9 grid.
+    """
+    try:
+        text = page.decode('utf-8')
+    except UnicodeDecodeError:
+        text = page.decode('latin-1')
+    parser = _GridParser()
+    try:
+        parser.feed(text)
+        parser.close()
+    except _ParseDone:
+        pass
+    except ValueError:
+        return _parse_page_with_soup(page)
+    if len(parser.grid) != _SIZE or any(len(row) != _SIZE for row in parser.grid):
+        return _parse_page_with_soup(page)
+    return parser.grid, parser.puzzle_id
+
+
+def _parse_puzzle_page(page: bytes) -> ([[int]], str):
+    """Returns the grid and the puzzle id of the puzzle page. Raises ScrapeError if it has no id."""
+    puzzle, puzzle_id = parse_page(page)
+    if puzzle_id is None:
+        raise ScrapeError('the puzzle page has no puzzle id')
+    return puzzle, puzzle_id
+
+
+def _parse_page_with_soup(page: bytes) -> ([[int]], str):
+    """
+    Returns the grid and the puzzle id of the page, read from a full BeautifulSoup
+    tree. Raises ScrapeError if the page does not hold a grid.
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(page, 'lxml')
+    board = [[0] * _SIZE for _ in range(_SIZE)]
+    try:
+        _construct_sudoku(soup, board)
+    except (ValueError, IndexError) as error:
+        raise ScrapeError('the page does not hold a sudoku grid') from error
+    return board, _get_puzzle_id(soup)
+
+
+def _get_puzzle_id(soup: 'BeautifulSoup') -> str:
+    """Returns the id number of the puzzle, or None if the page has none."""
+    grids = soup.find_all('div', 'grid')
+    texts = grids[0].find_all(string=True) if grids else []
+    for text in texts:
+        match = search(_PUZZLE_ID, text) if text.find_parent('td') is None else None
+        if match is not None:
+            return match.group(1)
+    return None
+
+
+def _get_path(response: str, id_number: int) -> str:
+    """Returns the path of the correct page, relative to the base url, based on the given response."""
     if response == 'solution':
-        return f'http://www.menneske.no/sudoku/eng/solution.html?number={id_number}'
+        return f'solution.html?number={id_number}'
     else:
-        return f'http://www.menneske.no/sudoku/eng/random.html?diff={id_number}'
+        return f'random.html?diff={id_number}'
+
+
+def solve_locally(puzzle: [[int]]) -> [[int]]:
+    """
+    Returns the solution of the puzzle, or None if it does not have exactly one.
+    A single search both counts the solutions and keeps the first one found.
+    """
+    solver = BitmaskSolver(puzzle)
+    if solver.count_solutions(2) != 1:
+        return None
+    return to_board(solver.first_solution)
+
+
+def scrape_puzzle(response: (str, int), cross_check: bool = False) -> ([[int]], [[int]], str):
+    """
+    Returns a random (puzzle, solution, puzzle id) triple from the website for
+    the (difficulty, level) response. See AsyncScraper.fetch_puzzle.
+    """
+    async def fetch() -> ([[int]], [[int]], str):
+        async with AsyncScraper(connections=1) as scraper:
+            return await scraper.fetch_puzzle(response[1], cross_check)
+
+    return asyncio.run(fetch())
 
 
 def get_sudoku_puzzle(response: (str, str), board: [[int]]) -> str:
     """Gets the sudoku puzzle from the website."""
 
-    puzzle_url = _get_url(*response)
-    soup = _scrape_puzzle(puzzle_url)
-    _construct_sudoku(soup, board)
-    return _get_puzzle_id(soup)
+    puzzle, puzzle_id = _parse_puzzle_page(_scrape_puzzle(_get_path(*response)))
+    for row, entries in zip(board, puzzle):
+        row[:] = entries
+    return puzzle_id
 
 
 def get_sudoku_solution(response: (str, int), board: [[int]]) -> None:
     """Gets the solution to the sudoku puzzle that was scraped from the website."""
-    solution_url = _get_url(*response)
-    soup = _scrape_puzzle(solution_url)
-    _construct_sudoku(soup, board)
+    solution, _ = parse_page(_scrape_puzzle(_get_path(*response)))
+    for row, entries in zip(board, solution):
+        row[:] = entries
 
 
-def _scrape_puzzle(url: str) -> BeautifulSoup:
-    """
-    Returns a beautiful soup object that contains
-    data that was scraped from the url.
-    """
-    while True:
-        response = None
-        try:
-            response = urllib.request.urlopen(url)
-            data = response.read()
-            soup = BeautifulSoup(data, 'lxml')
-            return soup
-        except urllib.error:
-            pass
-        finally:
-            if response is not None:
-                response.close()
-
-
-def _construct_sudoku(soup: BeautifulSoup, board: [[int]]) -> None:
+async def _fetch_page(path: str) -> bytes:
+    """Returns the body of the page at the path using a short-lived scraper."""
+    async with AsyncScraper(connections=1) as scraper:
+        return await scraper.fetch(path)
+
+
+def _scrape_puzzle(path: str) -> bytes:
+    """Returns the page that was scraped from the path."""
+    return asyncio.run(_fetch_page(path))
+
+
+def _construct_sudoku(soup: 'BeautifulSoup', board: [[int]]) -> None:
     """
     Based on the given beautiful soup object, it
     construct either the solution to a sudoku puzzle or
@@ -68,6 +440,3 @@ def _construct_sudoku(soup: BeautifulSoup, board: [[int]]) -> None:
                 board[row_pos][col_pos] = int(entry.text)
             else:
                 board[row_pos][col_pos] = 0
-
-
-#get_sudoku_puzzle(('easy', 3), [[0] * 9 for row in range(9)])
@@ -0,0 +1,418 @@
+from sudoku_units import SIZE, CELLS, PEERS, UNITS, INTERSECTIONS, ROW_OF, COL_OF, BOX_OF
+from sudoku_codec import cells_of
+
+_ALL_CANDIDATES = (1 << SIZE) - 1
+_POPCOUNT = tuple(bin(mask).count('1') for mask in range(1 << SIZE))
+_DIGIT = {1 << (digit - 1): digit for digit in range(1, SIZE + 1)}
+_BITS = tuple(tuple(bit for bit in reversed(tuple(_DIGIT)) if mask & bit) for mask in range(1 << SIZE))
+
+
+class BitmaskSolver:
+    """
+    Represents a sudoku solver that stores the digits used by every row,
+    column and block as 9-bit integer masks and the pencil marks of every
+    empty cell as a bitmask of its candidates.
+    """
+
+    def __init__(self, board: 'bytes | [int] | [[int]]', use_lcv: bool = False) -> None:
+        """
+        Initializes the state of the solver from the given NxN or flat 81-cell board.
+        If use_lcv is True, the values of each guessed cell are tried in least
+        constraining value order instead of ascending order.
+        """
+        self._use_lcv = use_lcv
+        self._cells = cells_of(board)
+        self._row_masks = [0] * SIZE
+        self._col_masks = [0] * SIZE
+        self._box_masks = [0] * SIZE
+        self._candidates = [0] * CELLS
+        self._trail = []
+        self._guesses = 0
+        self._first_solution = None
+        self._is_consistent = True
+        self._is_failed = False
+        for index, entry in enumerate(self._cells):
+            if entry != 0:
+                bit = 1 << (entry - 1)
+                if self._used_digits(index) & bit:
+                    self._is_consistent = False
+                self._occupy(index, bit)
+        self._empty = [index for index, entry in enumerate(self._cells) if entry == 0]
+        for index in self._empty:
+            self._candidates[index] = _ALL_CANDIDATES & ~self._used_digits(index)
+            if self._candidates[index] == 0:
+                self._is_consistent = False
+
+    @property
+    def board(self) -> [[int]]:
+        """Returns the current state of the solver's grid as an NxN board."""
+        return [self._cells[row:row + SIZE] for row in range(0, CELLS, SIZE)]
+
+    @property
+    def cells(self) -> bytes:
+        """Returns the current state of the solver's grid as 81 bytes in row-major order."""
+        return bytes(self._cells)
+
+    @property
+    def first_solution(self) -> bytes:
+        """
+        Returns the first solution found by the last solve or count_solutions as
+        81 bytes in row-major order, or None if none was found.
+        """
+        return self._first_solution
+
+    @property
+    def pencil_marks(self) -> {(int, int): {int}}:
+        """
+        Returns a dictionary that contains the coordinates of the empty cells
+        and their possible values.
+        """
+        return {divmod(index, SIZE): {digit for bit, digit in _DIGIT.items() if self._candidates[index] & bit}
+                for index in self._empty if self._cells[index] == 0}
+
+    @property
+    def is_solved(self) -> bool:
+        """Returns True if every cell of the grid is filled."""
+        return all(self._cells)
+
+    @property
+    def guesses(self) -> int:
+        """Returns the number of times the search had to branch on a cell."""
+        return self._guesses
+
+    def forbid(self, coord: (int, int), entry: int) -> None:
+        """
+        Removes the entry from the pencil marks of the empty cell at the given
+        coordinate so that no solution found afterwards places it there.
+        """
+        row, col = coord
+        index = row * SIZE + col
+        if self._cells[index] == 0:
+            self._candidates[index] &= ~(1 << (entry - 1))
+            if self._candidates[index] == 0:
+                self._is_consistent = False
+
+    def solve(self) -> bool:
+        """
+        Returns True if the grid was solved. On success the solver's grid holds
+        the solution, otherwise the grid is left unchanged.
+        """
+        self._limit = 1
+        self._found = 0
+        self._first_solution = None
+        return self._is_consistent and self._search()
+
+    def count_solutions(self, limit: int = None) -> int:
+        """
+        Returns the number of solutions that the grid has. If a limit is given,
+        the search stops as soon as that many solutions have been found.
+        """
+        self._limit = limit
+        self._found = 0
+        self._first_solution = None
+        if self._is_consistent:
+            self._search()
+        return self._found
+
+    def _used_digits(self, index: int) -> int:
+        """Returns the mask of digits already placed in the peers of the given cell."""
+        return self._row_masks[ROW_OF[index]] | self._col_masks[COL_OF[index]] | self._box_masks[BOX_OF[index]]
+
+    def _occupy(self, index: int, bit: int) -> None:
+        """Marks the given digit bit as used in the row, column and block of the cell."""
+        self._row_masks[ROW_OF[index]] |= bit
+        self._col_masks[COL_OF[index]] |= bit
+        self._box_masks[BOX_OF[index]] |= bit
+
+    def propagate(self) -> bool:
+        """
+        Applies naked/hidden singles, naked/hidden pairs and pointing/claiming
+        to the pencil marks until none of them makes progress. Returns False
+        if the grid turned out to have no solution.
+        """
+        self._is_failed = not self._is_consistent
+        return self._propagate()
+
+    def step(self) -> (str, int):
+        """
+        Applies the technique that is easiest for a human among those that make
+        progress, over the whole grid. Returns its name and the number of
+        deductions it made: the cells it filled for the singles, or the cells whose
+        pencil marks it narrowed for the others. Returns None if no technique made
+        progress or the grid turned out to have no solution.
+        """
+        techniques = (('hidden single', self._hidden_singles), ('naked single', self._naked_singles),
+                      ('intersection', self._intersections), ('naked pair', self._naked_pairs),
+                      ('hidden pair', self._hidden_pairs))
+        if not self._is_consistent or self._is_failed:
+            return None
+        for name, technique in techniques:
+            mark = len(self._trail)
+            if technique():
+                if self._is_failed:
+                    return None
+                changes = self._trail[mark:]
+                if name.endswith('single'):
+                    return name, sum(1 for index, _ in changes if index < 0)
+                return name, len(changes)
+        return None
+
+    def _assign(self, index: int, bit: int) -> None:
+        """
+        Places the digit in the cell and discards it from the pencil marks of its
+        empty peers, recording every change it makes on the trail.
+        """
+        cells, candidates, trail = self._cells, self._candidates, self._trail
+        cells[index] = _DIGIT[bit]
+        trail.append((~index, 0))
+        for peer in PEERS[index]:
+            if candidates[peer] & bit and cells[peer] == 0:
+                trail.append((peer, candidates[peer]))
+                candidates[peer] ^= bit
+                if candidates[peer] == 0:
+                    self._is_failed = True
+
+    def _eliminate(self, indices: (int,), mask: int) -> bool:
+        """
+        Discards the digits in the mask from the pencil marks of the given empty
+        cells, recording the changes on the trail. Returns True if anything changed.
+        """
+        cells, candidates, trail = self._cells, self._candidates, self._trail
+        changed = False
+        for index in indices:
+            if candidates[index] & mask and cells[index] == 0:
+                trail.append((index, candidates[index]))
+                candidates[index] &= ~mask
+                changed = True
+                if candidates[index] == 0:
+                    self._is_failed = True
+        return changed
+
+    def _undo(self, mark: int) -> None:
+        """
+        Restores the cells and pencil marks recorded on the trail since the given
+        mark, most recent first.
+        """
+        cells, candidates, trail = self._cells, self._candidates, self._trail
+        while len(trail) > mark:
+            index, mask = trail.pop()
+            if index < 0:
+                cells[~index] = 0
+            else:
+                candidates[index] = mask
+        self._is_failed = False
+
+    def _propagate(self, is_thorough: bool = True) -> bool:
+        """
+        Runs the propagation techniques, cheapest first, until they reach a
+        fixpoint. Unless thorough, only the singles are applied. Returns False
+        if a contradiction was found.
+        """
+        while not self._is_failed:
+            if not (self._naked_singles() or self._hidden_singles() or is_thorough
+                    and (self._intersections() or self._naked_pairs() or self._hidden_pairs())):
+                return True
+        return False
+
+    def _naked_singles(self) -> bool:
+        """Fills every empty cell that has a single candidate left."""
+        cells, candidates = self._cells, self._candidates
+        changed = False
+        for index in self._empty:
+            if cells[index] == 0:
+                mask = candidates[index]
+                if mask == 0:
+                    self._is_failed = True
+                    return True
+                if mask & (mask - 1) == 0:
+                    self._assign(index, mask)
+                    if self._is_failed:
+                        return True
+                    changed = True
+        return changed
+
+    def _hidden_singles(self) -> bool:
+        """Fills every cell that is the only place left for a digit in one of its units."""
+        cells, candidates = self._cells, self._candidates
+        changed = False
+        for unit in UNITS:
+            once = twice = placed = 0
+            for index in unit:
+                if cells[index] == 0:
+                    mask = candidates[index]
+                    twice |= once & mask
+                    once |= mask
+                else:
+                    placed |= 1 << (cells[index] - 1)
+            if once | placed != _ALL_CANDIDATES:
+                self._is_failed = True
+                return True
+            singles = once & ~twice
+            while singles:
+                bit = singles & -singles
+                singles ^= bit
+                for index in unit:
+                    if cells[index] == 0 and candidates[index] & bit:
+                        self._assign(index, bit)
+                        break
+                if self._is_failed:
+                    return True
+                changed = True
+        return changed
+
+    def _naked_pairs(self) -> bool:
+        """
+        Applies naked pairs: when two cells of a unit share the same two candidates,
+        those digits are discarded from the rest of the unit.
+        """
+        cells, candidates = self._cells, self._candidates
+        changed = False
+        for unit in UNITS:
+            empty = [index for index in unit if cells[index] == 0]
+            seen = {}
+            for index in empty:
+                mask = candidates[index]
+                if _POPCOUNT[mask] == 2:
+                    if mask in seen:
+                        partners = (seen[mask], index)
+                        changed |= self._eliminate([peer for peer in empty if peer not in partners], mask)
+                    else:
+                        seen[mask] = index
+        return changed
+
+    def _hidden_pairs(self) -> bool:
+        """
+        Applies hidden pairs: when two digits can only go in the same two cells of
+        a unit, every other candidate is discarded from those cells.
+        """
+        cells, candidates = self._cells, self._candidates
+        changed = False
+        for unit in UNITS:
+            empty = [index for index in unit if cells[index] == 0]
+            once = twice = thrice = 0
+            for index in empty:
+                mask = candidates[index]
+                thrice |= twice & mask
+                twice |= once & mask
+                once |= mask
+            doubles = twice & ~thrice
+            if _POPCOUNT[doubles] < 2:
+                continue
+            places = {}
+            while doubles:
+                bit = doubles & -doubles
+                doubles ^= bit
+                partners = tuple(index for index in empty if candidates[index] & bit)
+                places[partners] = places.get(partners, 0) | bit
+            for partners, mask in places.items():
+                if _POPCOUNT[mask] == 2:
+                    changed |= self._eliminate(partners, ~mask & _ALL_CANDIDATES)
+        return changed
+
+    def _intersections(self) -> bool:
+        """
+        Applies pointing, a digit of a block confined to one row or column, and
+        claiming, a digit of a row or column confined to one block.
+        """
+        cells, candidates = self._cells, self._candidates
+        changed = False
+        for segment, line_rest, box_rest in INTERSECTIONS:
+            segment_mask = 0
+            for index in segment:
+                if cells[index] == 0:
+                    segment_mask |= candidates[index]
+            if segment_mask == 0:
+                continue
+            line_mask = box_mask = 0
+            for index in line_rest:
+                if cells[index] == 0:
+                    line_mask |= candidates[index]
+            for index in box_rest:
+                if cells[index] == 0:
+                    box_mask |= candidates[index]
+            pointing = segment_mask & ~box_mask & line_mask
+            claiming = segment_mask & ~line_mask & box_mask
+            if pointing:
+                changed |= self._eliminate(line_rest, pointing)
+            if claiming:
+                changed |= self._eliminate(box_rest, claiming)
+            if self._is_failed:
+                return True
+        return changed
+
+    def _select_cell(self) -> int:
+        """
+        Following the most constrained variable heuristic, returns the empty cell
+        with the fewest candidates, or None if the grid is full.
+        """
+        cells, candidates, popcount = self._cells, self._candidates, _POPCOUNT
+        best_index, best_count = None, SIZE + 1
+        for index in self._empty:
+            if cells[index] == 0:
+                count = popcount[candidates[index]]
+                if count < best_count:
+                    best_index, best_count = index, count
+                    if count <= 2:
+                        break
+        return best_index
+
+    def _least_constraining_values(self, index: int) -> [int]:
+        """
+        Following the least constraining value heuristic, returns the candidate
+        bits of the cell ordered so that popping from the end yields the value
+        that appears in the fewest pencil marks of its empty peers first.
+        """
+        cells, candidates = self._cells, self._candidates
+        mask = candidates[index]
+        counts = dict.fromkeys(_BITS[mask], 0)
+        for peer in PEERS[index]:
+            shared = candidates[peer] & mask
+            if shared and cells[peer] == 0:
+                for bit in _BITS[shared]:
+                    counts[bit] += 1
+        return sorted(counts, key=counts.get, reverse=True)
+
+    def _search(self) -> bool:
+        """
+        Fills the empty cells using backtracking with constraint propagation
+        and the most constrained variable heuristic. The search is driven by
+        an explicit stack of frames, each holding a cell, its untried candidate
+        bits (ordered once when the frame is pushed) and the trail mark of its
+        current guess. Returns True once the number
+        of solutions found reaches the limit.
+        """
+        candidates = self._candidates
+        self._is_failed = False
+        is_consistent = self._propagate()
+        stack = []
+        while True:
+            if is_consistent:
+                index = self._select_cell()
+                if index is None:
+                    self._found += 1
+                    if self._found == 1:
+                        self._first_solution = bytes(self._cells)
+                    if self._limit is not None and self._found >= self._limit:
+                        return True
+                else:
+                    self._guesses += 1
+                    if self._use_lcv:
+                        values = self._least_constraining_values(index)
+                    else:
+                        values = list(_BITS[candidates[index]])
+                    stack.append([index, values, None])
+            while stack:
+                frame = stack[-1]
+                index, values, mark = frame
+                if mark is not None:
+                    self._undo(mark)
+                if values:
+                    bit = values.pop()
+                    frame[2] = len(self._trail)
+                    self._assign(index, bit)
+                    is_consistent = self._propagate(False)
+                    break
+                stack.pop()
+            else:
+                self._undo(0)
+                return False
@@ -1,3 +1,6 @@
+import asyncio
+from typing import Awaitable, Callable
+from sudoku_scraper import AsyncScraper, ScrapeError, parse_page
 
 puzzle1 =  [[0,0,0,2,6,0,7,0,1],
             [6,8,0,0,7,0,0,9,0],
@@ -236,5 +239,202 @@ puzzle21 = [[0,0,0,3,0,1,0,8,0],
             [0,4,0,6,0,3,0,0,0]]
 
 
-puzzles = [eval(f'puzzle{i}') for i in range(1,22)]
+puzzle22 = [[0,1,2,3,4,5,6,7,8],
+            [9,0,0,0,0,0,0,0,0],
+            [0,0,0,0,0,0,0,0,0],
+            [0,0,0,0,0,0,0,0,0],
+            [0,0,0,0,0,0,0,0,0],
+            [0,0,0,0,0,0,0,0,0],
+            [0,0,0,0,0,0,0,0,0],
+            [0,0,0,0,0,0,0,0,0],
+            [0,0,0,0,0,0,0,0,0],
+            ]
+
+puzzles = [eval(f'puzzle{i}') for i in range(1,23)]
   
+
+
+fixture_puzzles = {1001: (puzzle1, puzzle1_solution),
+                   1002: (puzzle2, [puzzle2_solution[0][row:row + 9] for row in range(0, 81, 9)])}
+
+
+def fixture_page(board: [[int]], puzzle_id: int, has_menu: bool = False, is_id_last: bool = False) -> bytes:
+    """
+    Returns a page laid out like the puzzle and solution pages of menneske.no,
+    optionally with a layout table above the grid div or the id below the grid.
+    """
+    rows = ''.join('<tr class="grid">' + ''.join(f'<td>{entry or "&nbsp;"}</td>' for entry in row) + '</tr>'
+                   for row in board)
+    menu = '<table><tr><td>Menu 42</td></tr></table>' if has_menu else ''
+    number = f'<div>Showing puzzle number: {puzzle_id}</div>'
+    grid = f'<table>{rows}</table>{number}' if is_id_last else f'{number}<table>{rows}</table>'
+    return f'<html><body>{menu}<div class="grid">{grid}</div></body></html>'.encode('utf-8')
+
+
+class StandInServer:
+    """
+    Represents a local stand-in for menneske.no that serves the fixture pages
+    over keep-alive HTTP/1.1 from a background thread. Random puzzle pages cycle
+    through the given (puzzle, solution) pairs by id, the first `failures`
+    requests answer 503 and any path under /moved/ redirects to the same path
+    without that prefix.
+    """
+
+    def __init__(self, failures: int = 0, puzzles: {int: ([[int]], [[int]])} = None) -> None:
+        """Starts serving the fixture puzzles, or the given ones, on a free port of localhost."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from threading import Thread
+        from urllib.parse import urlsplit, parse_qs
+        stand_in = self
+        self.failures = failures
+        self.requests = 0
+        self.connections = 0
+        self.puzzles = fixture_puzzles if puzzles is None else puzzles
+        self._ids = sorted(self.puzzles)
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self) -> None:
+                super().setup()
+                stand_in.connections += 1
+
+            def do_GET(self) -> None:
+                stand_in.requests += 1
+                url = urlsplit(self.path)
+                query = parse_qs(url.query)
+                if stand_in.requests <= stand_in.failures:
+                    self._answer(503, b'busy')
+                elif url.path.startswith('/moved/'):
+                    self._answer(301, b'moved', self.path[len('/moved'):])
+                elif url.path.endswith('/random.html'):
+                    puzzle_id = stand_in._ids[stand_in.requests % len(stand_in._ids)]
+                    self._answer(200, fixture_page(stand_in.puzzles[puzzle_id][0], puzzle_id))
+                elif url.path.endswith('/solution.html') and int(query['number'][0]) in stand_in.puzzles:
+                    puzzle_id = int(query['number'][0])
+                    self._answer(200, fixture_page(stand_in.puzzles[puzzle_id][1], puzzle_id))
+                else:
+                    self._answer(404, b'not found')
+
+            def _answer(self, status: int, body: bytes, location: str = None) -> None:
+                self.send_response(status)
+                if location is not None:
+                    self.send_header('Location', location)
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        """Returns the url that stands in for the sudoku section of menneske.no."""
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/sudoku/eng/'
+
+    def close(self) -> None:
+        """Stops serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _scrape(server: StandInServer, scrape: Callable[[AsyncScraper], Awaitable] = None, **options) -> object:
+    """
+    Runs scrape, or fetching one puzzle by default, on a scraper of the stand-in
+    server, closes the server and returns the result.
+    """
+    async def run() -> object:
+        async with AsyncScraper(options.pop('base_url', server.base_url), backoff=0.01, **options) as scraper:
+            return await (scrape or _fetch_one)(scraper)
+
+    try:
+        return asyncio.run(run())
+    finally:
+        server.close()
+
+
+def _fetch_one(scraper: AsyncScraper) -> Awaitable:
+    """Fetches a random puzzle of level 1."""
+    return scraper.fetch_puzzle(1)
+
+
+def test_fetch_retries_until_the_server_answers():
+    server = StandInServer(failures=2)
+    puzzle, solution, puzzle_id = _scrape(server, retries=2)
+    assert (puzzle, solution) == fixture_puzzles[int(puzzle_id)]
+    assert server.requests == 3
+
+
+def test_fetch_gives_up_at_the_retry_cap():
+    server = StandInServer(failures=10)
+    try:
+        _scrape(server, retries=2)
+    except ScrapeError:
+        pass
+    else:
+        raise AssertionError('expected a ScrapeError once the retry cap is reached')
+    assert server.requests == 3
+
+
+def test_connections_are_kept_alive():
+    server = StandInServer()
+
+    async def fetch_several(scraper: AsyncScraper) -> None:
+        for _ in range(4):
+            await scraper.fetch_puzzle(1, cross_check=True)
+
+    _scrape(server, fetch_several, connections=1)
+    assert server.requests == 8
+    assert server.connections < server.requests
+
+
+def test_fetch_follows_redirects():
+    server = StandInServer()
+    puzzle, solution, puzzle_id = _scrape(server, base_url=server.base_url.replace('/sudoku/', '/moved/sudoku/'))
+    assert (puzzle, solution) == fixture_puzzles[int(puzzle_id)]
+
+
+def test_fetch_many_drops_repeated_puzzles():
+    server = StandInServer()
+    found = _scrape(server, lambda scraper: scraper.fetch_many('easy', 5))
+    assert sorted(int(puzzle_id) for _, _, puzzle_id in found) == sorted(fixture_puzzles)
+    for puzzle, solution, puzzle_id in found:
+        assert (puzzle, solution) == fixture_puzzles[int(puzzle_id)]
+
+
+def test_cross_check_rejects_a_disagreeing_solution():
+    wrong_solution = [row[:] for row in puzzle1_solution]
+    wrong_solution[0][0], wrong_solution[0][1] = wrong_solution[0][1], wrong_solution[0][0]
+    puzzles = {1001: (puzzle1, wrong_solution)}
+    assert _scrape(StandInServer(puzzles=puzzles))[1] == puzzle1_solution
+    try:
+        _scrape(StandInServer(puzzles=puzzles), lambda scraper: scraper.fetch_puzzle(1, cross_check=True))
+    except ScrapeError:
+        pass
+    else:
+        raise AssertionError('expected a ScrapeError for a solution page that disagrees')
+
+
+_PAGE_LAYOUTS = ({}, {'has_menu': True}, {'is_id_last': True}, {'has_menu': True, 'is_id_last': True})
+
+
+def test_parse_page_reads_the_id_outside_the_grid_cells():
+    for layout in _PAGE_LAYOUTS:
+        for puzzle_id, board in enumerate(puzzles, 1001):
+            assert parse_page(fixture_page(board, puzzle_id, **layout)) == (board, str(puzzle_id))
+
+
+def test_soup_fallback_reads_the_id_outside_the_grid_cells():
+    import pytest
+    pytest.importorskip('bs4')
+    pytest.importorskip('lxml')
+    from sudoku_scraper import _parse_page_with_soup
+    for layout in _PAGE_LAYOUTS:
+        for puzzle_id, board in enumerate(puzzles, 1001):
+            assert _parse_page_with_soup(fixture_page(board, puzzle_id, **layout)) == (board, str(puzzle_id))
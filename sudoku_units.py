@@ -0,0 +1,45 @@
+SIZE = 9
+BLOCK_SIZE = 3
+CELLS = SIZE * SIZE
+
+COORDS = tuple(divmod(index, SIZE) for index in range(CELLS))
+ROW_OF = tuple(row for row, _ in COORDS)
+COL_OF = tuple(col for _, col in COORDS)
+BOX_OF = tuple((row // BLOCK_SIZE) * BLOCK_SIZE + col // BLOCK_SIZE for row, col in COORDS)
+
+ROWS = tuple(tuple(index for index in range(CELLS) if ROW_OF[index] == row) for row in range(SIZE))
+COLUMNS = tuple(tuple(index for index in range(CELLS) if COL_OF[index] == col) for col in range(SIZE))
+BOXES = tuple(tuple(index for index in range(CELLS) if BOX_OF[index] == box) for box in range(SIZE))
+UNITS = ROWS + COLUMNS + BOXES
+
+ROW_PEERS = tuple(tuple(peer for peer in ROWS[ROW_OF[index]] if peer != index) for index in range(CELLS))
+COL_PEERS = tuple(tuple(peer for peer in COLUMNS[COL_OF[index]] if peer != index) for index in range(CELLS))
+BOX_PEERS = tuple(tuple(peer for peer in BOXES[BOX_OF[index]] if peer != index) for index in range(CELLS))
+PEERS = tuple(tuple(sorted({*ROW_PEERS[index], *COL_PEERS[index], *BOX_PEERS[index]})) for index in range(CELLS))
+
+BOX_COORDS = tuple(tuple(COORDS[cell] for cell in BOXES[BOX_OF[index]]) for index in range(CELLS))
+
+
+def index_of(coord: (int, int)) -> int:
+    """Returns the flat cell index of the given (row, col) coordinate."""
+    row, col = coord
+    return row * SIZE + col
+
+
+def _build_intersections() -> (((int,), (int,), (int,)),):
+    """
+    Returns a tuple that contains, for every overlap of a block with a row or
+    column, the overlapping cells, the rest of the line and the rest of the block.
+    """
+    intersections = []
+    for box in BOXES:
+        for line in ROWS + COLUMNS:
+            segment = tuple(index for index in box if index in line)
+            if segment:
+                line_rest = tuple(index for index in line if index not in segment)
+                box_rest = tuple(index for index in box if index not in segment)
+                intersections.append((segment, line_rest, box_rest))
+    return tuple(intersections)
+
+
+INTERSECTIONS = _build_intersections()
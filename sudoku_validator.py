@@ -0,0 +1,28 @@
+import numpy as np
+from sudoku_units import SIZE, BLOCK_SIZE
+
+_FULL = (1 << SIZE) - 1
+_DIGIT_MASKS = np.zeros(256, dtype=np.uint16)
+_DIGIT_MASKS[1:SIZE + 1] = 1 << np.arange(SIZE, dtype=np.uint16)
+
+
+def validate_many(boards: 'np.ndarray', chunk_size: int = 65536) -> 'np.ndarray':
+    """
+    Returns a boolean array that is True for every board whose rows, columns and
+    blocks each hold the digits 1 to 9 exactly once. The boards are an (N, 9, 9)
+    or (N, 81) uint8 array, such as np.frombuffer over N 81-byte boards joined
+    together. Every digit is turned into its bit and each unit is valid if the
+    bits of its cells OR together to all nine, which only a permutation reaches.
+    The boards are checked chunk_size at a time to bound the memory used.
+    """
+    boards = np.asarray(boards, dtype=np.uint8).reshape(-1, SIZE, SIZE)
+    valid = np.empty(len(boards), dtype=bool)
+    for start in range(0, len(boards), chunk_size):
+        masks = _DIGIT_MASKS[boards[start:start + chunk_size]]
+        blocks = masks.reshape(-1, BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE) \
+            .swapaxes(2, 3).reshape(-1, SIZE, SIZE)
+        rows_valid = (np.bitwise_or.reduce(masks, axis=2) == _FULL).all(axis=1)
+        cols_valid = (np.bitwise_or.reduce(masks, axis=1) == _FULL).all(axis=1)
+        blocks_valid = (np.bitwise_or.reduce(blocks, axis=2) == _FULL).all(axis=1)
+        valid[start:start + chunk_size] = rows_valid & cols_valid & blocks_valid
+    return valid
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+import pygame
+
+
+class TextCache:
+    """
+    Represents a bounded cache of rendered text surfaces keyed by font, text and
+    color. When full, the least recently used surface is evicted.
+    """
+
+    def __init__(self, capacity: int = 256) -> None:
+        """Initializes an empty cache that holds at most capacity surfaces."""
+        self._capacity = capacity
+        self._surfaces = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        """Returns the number of cached surfaces."""
+        return len(self._surfaces)
+
+    @property
+    def hits(self) -> int:
+        """Returns the number of renders that were served from the cache."""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """Returns the number of renders that had to rasterize the text."""
+        return self._misses
+
+    def render(self, font: pygame.font.Font, text: str, color: (int,)) -> pygame.Surface:
+        """
+        Returns the antialiased surface of the text in the font and color. The
+        surface is shared with every other caller, so it must only be blitted.
+        """
+        key = (font, text, tuple(color))
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+        self._misses += 1
+        surface = font.render(text, True, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self._capacity:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self) -> None:
+        """Empties the cache and resets its counters."""
+        self._surfaces.clear()
+        self._hits = 0
+        self._misses = 0
+
+
+text_cache = TextCache()
+
+
+def render_text(font: pygame.font.Font, text: str, color: (int,)) -> pygame.Surface:
+    """Returns the surface of the text from the shared text cache."""
+    return text_cache.render(font, text, color)